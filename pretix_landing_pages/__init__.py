@@ -16,6 +16,8 @@ class PluginApp(PluginConfig):
 
     def ready(self):
         from . import signals  # NOQA
+        from .render_budget import install_render_time_check
+        install_render_time_check()
 
 
 default_app_config = 'pretix_landing_pages.PluginApp'
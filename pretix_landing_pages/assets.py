@@ -0,0 +1,283 @@
+import gzip
+import hashlib
+import logging
+import os
+import re
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import F
+from django.utils.timezone import now
+from PIL import Image
+
+from .cache import invalidate_asset_manifest, invalidate_landingpage_state
+from .models import (
+    COMPRESSED_SUFFIXES, LandingpageFile, LandingpageSettings,
+    StartingpageFile, StartingpageSettings, media_storage,
+)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# File extensions of uploaded files that are stored precompressed in addition to their original version.
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.html', '.htm', '.json', '.map', '.txt', '.xml')
+
+# Number of hex digits of the content hash that are put into the name of a fingerprinted file.
+FINGERPRINT_LENGTH = 12
+
+# Outdated fingerprinted copies are kept this long, so cached pages that still reference them keep working.
+FINGERPRINT_RETENTION = timedelta(days=7)
+
+# Number of seconds between two collections of outdated fingerprinted copies. pretix sends its periodic task every few
+# minutes, but as the copies are kept for days, going through all uploaded files once a day is enough.
+FINGERPRINT_COLLECTION_INTERVAL = 24 * 3600
+
+# File extensions of uploaded raster images that are additionally stored as resized variants.
+RESIZABLE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+# Widths of the resized variants of uploaded images, unless configured otherwise in the pretix config file.
+DEFAULT_IMAGE_VARIANT_WIDTHS = (480, 960, 1440)
+
+# Formats of the resized variants and the file extensions they are stored with.
+IMAGE_VARIANT_FORMATS = (('webp', 'WEBP', '.webp'), ('jpeg', 'JPEG', '.jpg'))
+
+# Number of seconds the name of a bundle of uploaded files is cached. Afterwards the tag checks again that the bundle
+# exists and renews it if it is about to be collected, which keeps bundles that are still used alive.
+BUNDLE_CACHE_TTL = 24 * 3600
+
+# File extensions of uploaded files that can be bundled and the separators put between the concatenated files.
+BUNDLE_SEPARATORS = {'.css': b'\n', '.js': b';\n'}
+
+fingerprinted_name_pattern = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[^.]+)?$' % FINGERPRINT_LENGTH)
+
+
+def get_fingerprinted_name(name, content_hash):
+    """
+    returns the name of the fingerprinted copy of a stored file
+    :param name: the name of the file in the storage, e.g. templates/landing_pages/1/style.css
+    :param content_hash: the hash of the content of the file
+    :return: the name containing the hash, e.g. templates/landing_pages/1/style.0123456789ab.css
+    """
+    stem, ext = os.path.splitext(name)
+    return '%s.%s%s' % (stem, content_hash[:FINGERPRINT_LENGTH], ext)
+
+
+def get_public_name(file_model):
+    """
+    returns the name under which an uploaded file is published
+    files uploaded before fingerprinting was introduced are published under their plain name
+    :param file_model: a LandingpageFile or StartingpageFile
+    """
+    if file_model.content_hash:
+        return get_fingerprinted_name(file_model.file.name, file_model.content_hash)
+    return file_model.file.name
+
+
+def get_image_variant_name(file_model, width, ext):
+    """
+    returns the name of a resized variant of an uploaded image, it is fingerprinted like the image itself
+    :param file_model: a LandingpageFile or StartingpageFile with a content hash
+    :param width: the width of the variant in pixels
+    :param ext: the file extension of the format of the variant, e.g. .webp
+    :return: the name of the variant, e.g. templates/landing_pages/1/hero-480w.0123456789ab.webp
+    """
+    stem = os.path.splitext(file_model.file.name)[0]
+    return get_fingerprinted_name('%s-%dw%s' % (stem, width, ext), file_model.content_hash)
+
+
+def get_image_variant_names(file_model):
+    """
+    returns the names of all stored resized variants of an uploaded image
+    :param file_model: a LandingpageFile or StartingpageFile
+    :return: a list of (format, width, name) tuples, e.g. ('webp', 480, 'templates/landing_pages/1/hero-480w.….webp')
+    """
+    if not file_model.content_hash or not file_model.variant_widths:
+        return []
+    widths = [int(width) for width in file_model.variant_widths.split(',')]
+    return [
+        (variant_format, width, get_image_variant_name(file_model, width, ext))
+        for variant_format, __, ext in IMAGE_VARIANT_FORMATS
+        for width in widths
+    ]
+
+
+def get_image_variant_widths():
+    """
+    returns the widths of the resized variants of uploaded images
+    they can be configured as a comma separated list with image_widths in the [pretix_landing_pages] section of the config file
+    """
+    widths = settings.CONFIG_FILE.get('pretix_landing_pages', 'image_widths', fallback='')
+    if not widths.strip():
+        return DEFAULT_IMAGE_VARIANT_WIDTHS
+    return tuple(sorted({int(width) for width in widths.split(',') if width.strip()}))
+
+
+def prepare_uploaded_file(file_model):
+    """
+    stores the fingerprinted, compressed and resized copies of an uploaded file without saving its model
+    :param file_model: a LandingpageFile or StartingpageFile whose file is already stored
+    """
+    fingerprint_file(file_model)
+    compress_file(file_model.file.storage, file_model.file.name)
+    compress_file(file_model.file.storage, get_public_name(file_model))
+    resize_image(file_model)
+
+
+def fingerprint_file(file_model):
+    """
+    stores a copy of an uploaded file under a name containing the hash of its content and sets the hash of the model
+    as the name changes with every new content, the copy can be cached forever by browsers and CDNs
+    :param file_model: a LandingpageFile or StartingpageFile whose file is already stored
+    """
+    storage = file_model.file.storage
+    content_hash = hashlib.sha256()
+    with storage.open(file_model.file.name, 'rb') as f:
+        for chunk in f.chunks():
+            content_hash.update(chunk)
+
+    file_model.content_hash = content_hash.hexdigest()
+    fingerprinted_name = get_public_name(file_model)
+    if not storage.exists(fingerprinted_name):
+        with storage.open(file_model.file.name, 'rb') as f:
+            storage.save(fingerprinted_name, f)
+
+
+def compress_file(storage, name):
+    """
+    stores gzip and, if the brotli package is installed, brotli compressed variants next to a compressible file
+    web servers can serve them directly to clients accepting these encodings instead of compressing on every request
+    :param storage: the storage containing the file
+    :param name: the name of the file in the storage
+    """
+    if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return
+    with storage.open(name, 'rb') as f:
+        content = f.read()
+    storage.save(name + '.gz', ContentFile(gzip.compress(content)))
+    if brotli is not None:
+        storage.save(name + '.br', ContentFile(brotli.compress(content)))
+
+
+def resize_image(file_model):
+    """
+    stores WebP and JPEG variants of an uploaded raster image at the configured widths and sets the widths of the model
+    images are never scaled up, a width larger than the image is replaced by the width of the image itself
+    files that cannot be read as images are left without variants
+    :param file_model: a LandingpageFile or StartingpageFile that has been fingerprinted
+    """
+    file_model.variant_widths = ''
+    if os.path.splitext(file_model.filename)[1].lower() not in RESIZABLE_EXTENSIONS:
+        return
+    storage = file_model.file.storage
+    try:
+        with storage.open(file_model.file.name, 'rb') as f:
+            image = Image.open(f)
+            image.load()
+    except (OSError, Image.DecompressionBombError):
+        logger.warning('No resized variants of %s are created, it is no readable image', file_model.file.name)
+        return
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    widths = sorted({min(width, image.width) for width in get_image_variant_widths()})
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS) if width < image.width else image
+        for __, pil_format, ext in IMAGE_VARIANT_FORMATS:
+            name = get_image_variant_name(file_model, width, ext)
+            if storage.exists(name):
+                continue
+            if pil_format == 'JPEG' and resized.mode == 'RGBA':
+                # JPEG has no alpha channel, transparent areas become white
+                flattened = Image.new('RGB', resized.size, (255, 255, 255))
+                flattened.paste(resized, mask=resized.getchannel('A'))
+                variant = flattened
+            else:
+                variant = resized
+            buffer = BytesIO()
+            variant.save(buffer, pil_format, quality=80)
+            storage.save(name, ContentFile(buffer.getvalue()))
+    file_model.variant_widths = ','.join(str(width) for width in widths)
+
+
+def build_bundle(file_models):
+    """
+    concatenates the published copies of uploaded stylesheets or scripts into one fingerprinted and compressed file
+    the bundle is stored next to the files, so relative urls in stylesheets keep working
+    :param file_models: the LandingpageFiles or StartingpageFiles in the order they are concatenated
+    :return: the name of the bundle in the storage, e.g. templates/landing_pages/1/bundle.0123456789ab.css
+    """
+    storage = file_models[0].file.storage
+    public_names = [get_public_name(file_model) for file_model in file_models]
+    ext = os.path.splitext(file_models[0].filename)[1].lower()
+    bundle_hash = hashlib.sha256('\n'.join(public_names).encode()).hexdigest()
+    name = os.path.join(os.path.dirname(file_models[0].file.name), get_fingerprinted_name('bundle' + ext, bundle_hash))
+    if storage.exists(name) and storage.get_modified_time(name) > now() - FINGERPRINT_RETENTION / 2:
+        return name
+
+    content = []
+    for public_name in public_names:
+        with storage.open(public_name, 'rb') as f:
+            content.append(f.read())
+    storage.save(name, ContentFile(BUNDLE_SEPARATORS.get(ext, b'\n').join(content)))
+    compress_file(storage, name)
+    return name
+
+
+def invalidate_assets(organizer_id):
+    """
+    drops the cached manifest of the uploaded files of an organizer or the starting page and increases the version
+    of its assets, so pages referencing the files are no longer considered unchanged
+    :param organizer_id: the id of the organizer or None for the starting page
+    """
+    invalidate_asset_manifest(organizer_id)
+    if organizer_id is None:
+        StartingpageSettings.objects.filter(pk=1).update(assets_version=F('assets_version') + 1)
+    else:
+        LandingpageSettings.objects.filter(pk=organizer_id).update(assets_version=F('assets_version') + 1)
+        invalidate_landingpage_state(organizer_id)
+
+
+def collect_outdated_fingerprinted_files():
+    """
+    deletes fingerprinted copies that are neither current nor younger than the retention period
+    """
+    current_names = set()
+    for model in (LandingpageFile, StartingpageFile):
+        for file_model in model.objects.only('file', 'content_hash', 'variant_widths').iterator():
+            current_names.add(file_model.file.name)
+            current_names.add(get_public_name(file_model))
+            current_names.update(name for __, __, name in get_image_variant_names(file_model))
+
+    for directory in _get_upload_directories():
+        for filename in media_storage.listdir(directory)[1]:
+            name = os.path.join(directory, filename)
+            original_name = _strip_compressed_suffix(name)
+            if original_name in current_names or not fingerprinted_name_pattern.match(os.path.basename(original_name)):
+                continue
+            if media_storage.get_modified_time(name) < now() - FINGERPRINT_RETENTION:
+                media_storage.delete(name)
+
+
+def _get_upload_directories():
+    directories = []
+    landing_pages_dir = os.path.join('templates', 'landing_pages')
+    if media_storage.exists(landing_pages_dir):
+        directories += [os.path.join(landing_pages_dir, d) for d in media_storage.listdir(landing_pages_dir)[0]]
+    starting_pages_dir = os.path.join('templates', 'starting_pages')
+    if media_storage.exists(starting_pages_dir):
+        directories.append(starting_pages_dir)
+    return directories
+
+
+def _strip_compressed_suffix(name):
+    for suffix in COMPRESSED_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
@@ -0,0 +1,287 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import translation
+from pretix.base.cache import NamespacedCache
+
+from .metrics import record_cache_lookup
+
+# GET parameters that change the output of a landing page. All other parameters are ignored when caching.
+CACHED_GET_PARAMETERS = ('month', 'year', 'upcoming_page', 'previous_page')
+
+# Number of seconds the last page rendered within the render budget is kept. An outdated page is still better than
+# none, but it should not outlive a longer outage of the budget or remain after the page was deleted.
+LAST_GOOD_RESPONSE_TTL = 7 * 24 * 3600
+
+# Number of seconds the state of a landing page is cached. It is dropped whenever its sources change, but a request
+# that built it from the database just before a change may still write the old state afterwards, which then only
+# lasts until it expires.
+LANDINGPAGE_STATE_TTL = 60
+
+
+def get_landingpage_cache(organizer_id):
+    """
+    returns the namespaced cache holding the rendered landing page responses of an organizer
+    clearing it drops every cached response of that organizer at once
+    :param organizer_id: the id of the organizer
+    :return: a NamespacedCache for the organizer
+    """
+    return NamespacedCache('pretix_landing_pages:landingpage:%d' % organizer_id)
+
+
+def invalidate_landingpage_cache(organizer_id):
+    """
+    removes all cached responses of the landing page of an organizer
+    :param organizer_id: the id of the organizer
+    """
+    get_landingpage_cache(organizer_id).clear()
+
+
+def get_landingpage_state_key(organizer_id):
+    return 'pretix_landing_pages:state:%d' % organizer_id
+
+
+def get_cached_landingpage_state(organizer_id):
+    return cache.get(get_landingpage_state_key(organizer_id))
+
+
+def set_cached_landingpage_state(organizer_id, state):
+    cache.set(get_landingpage_state_key(organizer_id), state, LANDINGPAGE_STATE_TTL)
+
+
+def invalidate_landingpage_state(*organizer_ids):
+    """
+    removes the cached landing page state of the given organizers, it is rebuilt on the next request
+    :param organizer_ids: the ids of the organizers
+    """
+    cache.delete_many([get_landingpage_state_key(organizer_id) for organizer_id in organizer_ids])
+
+
+def get_asset_manifest_key(organizer_id):
+    if organizer_id is None:
+        return 'pretix_landing_pages:assets:startingpage'
+    return 'pretix_landing_pages:assets:%d' % organizer_id
+
+
+def get_cached_asset_manifest(organizer_id):
+    return cache.get(get_asset_manifest_key(organizer_id))
+
+
+def set_cached_asset_manifest(organizer_id, manifest):
+    # the manifest is invalidated explicitly whenever a file is uploaded or deleted, so it never expires
+    cache.set(get_asset_manifest_key(organizer_id), manifest, None)
+
+
+def get_srcset_manifest_key(organizer_id):
+    return get_asset_manifest_key(organizer_id) + ':srcsets'
+
+
+def get_cached_srcset_manifest(organizer_id):
+    return cache.get(get_srcset_manifest_key(organizer_id))
+
+
+def set_cached_srcset_manifest(organizer_id, manifest):
+    # invalidated together with the manifest of the uploaded files
+    cache.set(get_srcset_manifest_key(organizer_id), manifest, None)
+
+
+def invalidate_asset_manifest(organizer_id):
+    """
+    removes the cached manifests of the uploaded files of an organizer or the starting page and their image variants
+    :param organizer_id: the id of the organizer or None for the starting page
+    """
+    cache.delete_many([get_asset_manifest_key(organizer_id), get_srcset_manifest_key(organizer_id)])
+
+
+def get_bundle_key(bundle_hash):
+    return 'pretix_landing_pages:bundle:%s' % bundle_hash
+
+
+def get_cached_bundle_name(bundle_hash):
+    return cache.get(get_bundle_key(bundle_hash))
+
+
+def set_cached_bundle_name(bundle_hash, name, timeout):
+    # the hash covers the fingerprinted names of the bundled files, so the entry never becomes outdated
+    cache.set(get_bundle_key(bundle_hash), name, timeout)
+
+
+def get_calendar_month_key(organizer_id, year, month, language, show_availability):
+    return 'pretix_landing_pages:calendar:%d:%d-%02d:%s:%d' % (organizer_id, year, month, language, show_availability)
+
+
+def get_cached_calendar_month(organizer_id, year, month, show_availability):
+    return cache.get(get_calendar_month_key(organizer_id, year, month, translation.get_language(), show_availability))
+
+
+def set_cached_calendar_month(organizer_id, year, month, show_availability, calendar_month, ttl):
+    cache.set(get_calendar_month_key(organizer_id, year, month, translation.get_language(), show_availability),
+              calendar_month, ttl)
+
+
+def invalidate_calendar_months(organizer_id, months):
+    """
+    removes the cached calendar data of the given months of an organizer in all languages
+    :param organizer_id: the id of the organizer
+    :param months: an iterable of (year, month) tuples
+    """
+    cache.delete_many([
+        get_calendar_month_key(organizer_id, year, month, language, show_availability)
+        for year, month in months
+        for language, __ in settings.LANGUAGES
+        for show_availability in (False, True)
+    ])
+
+
+def is_request_cacheable(request):
+    """
+    checks whether the page rendered for a request may be shared with other visitors
+    pages of logged in users and pages whose events are filtered by attributes are rendered for every request
+    :param request: httpRequest of the user
+    """
+    return request.method == 'GET' and not request.user.is_authenticated and not has_attribute_filter(request)
+
+
+def has_attribute_filter(request):
+    """
+    checks whether the events are filtered by their meta data attributes, set in the GET parameters or remembered in
+    the session by pretix
+    :param request: httpRequest of the user
+    """
+    if any(key.startswith('attr[') for key in request.GET):
+        return True
+    organizer = getattr(request, 'organizer', None)
+    if organizer is None:
+        return False
+    return bool(request.session.get('filter_qs_by_attr_{}_'.format(organizer.pk)))
+
+
+def get_cached_response(request, organizer_id):
+    """
+    looks up a previously rendered landing page for the given request
+    :param request: httpRequest of the user
+    :param organizer_id: the id of the organizer
+    :return: the cached httpResponse or None if there is none
+    """
+    if not is_request_cacheable(request):
+        return None
+    cached = get_landingpage_cache(organizer_id).get(_response_key(request))
+    record_cache_lookup('page', cached is not None)
+    if cached is None:
+        return None
+    content, content_type = cached
+    return HttpResponse(content, content_type=content_type)
+
+
+def cache_response(request, organizer_id, response, ttl):
+    """
+    stores a rendered landing page for subsequent anonymous requests
+    responses using a CSRF token are not cached, as the token is bound to the cookie of a single visitor
+    :param request: httpRequest of the user
+    :param organizer_id: the id of the organizer
+    :param response: the rendered httpResponse
+    :param ttl: the number of seconds the response is cached, 0 disables caching
+    """
+    if not ttl or not is_request_cacheable(request) or response.status_code != 200 \
+            or request.META.get('CSRF_COOKIE_USED'):
+        return
+    get_landingpage_cache(organizer_id).set(
+        _response_key(request), (response.content, response['Content-Type']), ttl)
+
+
+def get_last_good_response_key(organizer_id):
+    return 'pretix_landing_pages:last_good:%s:%s' % ('startingpage' if organizer_id is None else organizer_id,
+                                                     translation.get_language())
+
+
+def get_last_good_response(request, organizer_id):
+    """
+    looks up the last page that was rendered within the render budget for the given request
+    only pages without parameters like a month of the calendar are kept, other pages fall back to the default page
+    :param request: httpRequest of the user
+    :param organizer_id: the id of the organizer or None for the starting page
+    :return: the httpResponse or None if there is none
+    """
+    if not _is_unparameterized(request):
+        return None
+    stored = cache.get(get_last_good_response_key(organizer_id))
+    if stored is None:
+        return None
+    content, content_type = stored
+    return HttpResponse(content, content_type=content_type)
+
+
+def set_last_good_response(request, organizer_id, response):
+    """
+    remembers a page rendered for an anonymous visitor, it is served instead if a later rendering exceeds its budget
+    a single copy per organizer and language is kept and only written again once the page changed
+    :param request: httpRequest of the user
+    :param organizer_id: the id of the organizer or None for the starting page
+    :param response: the rendered httpResponse
+    """
+    if not is_request_cacheable(request) or not _is_unparameterized(request) or response.status_code != 200 \
+            or request.META.get('CSRF_COOKIE_USED'):
+        return
+    key = get_last_good_response_key(organizer_id)
+    digest = hashlib.sha1(response.content).hexdigest()
+    if cache.get(key + ':digest') == digest:
+        return
+    cache.set_many({key: (response.content, response['Content-Type']), key + ':digest': digest},
+                   LAST_GOOD_RESPONSE_TTL)
+
+
+def get_landingpage_etag(request, organizer_id, state):
+    """
+    returns the entity tag of a landing page, derived from the versions of its template, its uploaded files and the
+    events of the organizer, so it can be checked without rendering the page or querying events
+    the page also depends on the time, so the tag changes after the cache duration even if nothing else changed
+    pages filtered by attributes get no tag, as it would not tell them apart from the unfiltered page
+    :param request: httpRequest of the user
+    :param organizer_id: the id of the organizer
+    :param state: the landing page state of the organizer
+    :return: the quoted entity tag or None if the page must not be validated by it
+    """
+    if not state['cache_ttl'] or not is_request_cacheable(request):
+        return None
+    return _build_etag('landingpage', organizer_id, state['template_version'], state['assets_version'],
+                       state['events_version'], int(time.time() // state['cache_ttl']), _response_key(request))
+
+
+def get_startingpage_etag(request, setting):
+    """
+    returns the entity tag of the starting page, derived from the versions of its template and its uploaded files
+    :param request: httpRequest of the user
+    :param setting: the StartingpageSettings
+    :return: the quoted entity tag or None if the page must not be validated by it
+    """
+    if not is_request_cacheable(request):
+        return None
+    return _build_etag('startingpage', setting.template_version, setting.assets_version, translation.get_language())
+
+
+def set_etag(request, response, etag):
+    """
+    adds an entity tag to a response unless it contains data bound to a single visitor like a CSRF token
+    :param request: httpRequest of the user
+    :param response: the httpResponse
+    :param etag: the quoted entity tag or None
+    """
+    if etag and response.status_code == 200 and not request.META.get('CSRF_COOKIE_USED'):
+        response['ETag'] = etag
+
+
+def _build_etag(*parts):
+    return '"%s"' % hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _is_unparameterized(request):
+    return not any(key in request.GET for key in CACHED_GET_PARAMETERS)
+
+
+def _response_key(request):
+    parameters = sorted((key, request.GET.get(key)) for key in CACHED_GET_PARAMETERS if key in request.GET)
+    return 'response:%s:%s' % (translation.get_language(), urlencode(parameters))
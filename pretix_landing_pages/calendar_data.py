@@ -0,0 +1,240 @@
+import calendar
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import pytz
+from django.db.models import F, Q
+from django.utils.timezone import now
+from pretix.base.models import Event, SubEvent
+from pretix.multidomain.urlreverse import eventreverse, mainreverse
+from pretix.presale.views.organizer import filter_qs_by_attr
+
+from .cache import (
+    get_cached_calendar_month, has_attribute_filter,
+    invalidate_calendar_months, invalidate_landingpage_state,
+    set_cached_calendar_month,
+)
+from .events import fill_quota_availability
+from .metrics import record_cache_lookup
+from .models import LandingpageSettings
+from .views import get_landingpage_state
+
+# Number of seconds the calendar data of a month is cached. Changed events drop it earlier,
+# the timeout only bounds how long time dependent states like "Book now" or the availability may be outdated.
+CALENDAR_CACHE_TTL = 300
+
+
+def get_month_window(year, month):
+    """
+    returns the range of time shown in the calendar of a month, including the days just before and after it
+    :param year: the year of the month
+    :param month: the number of the month
+    :return: a tuple of the first and the last point in time of the range
+    """
+    _, ndays = calendar.monthrange(year, month)
+    before = datetime(year, month, 1, 0, 0, 0, tzinfo=pytz.UTC) - timedelta(days=1)
+    after = datetime(year, month, ndays, 0, 0, 0, tzinfo=pytz.UTC) + timedelta(days=1)
+    return before, after
+
+
+def get_calendar_month(request, year, month):
+    """
+    returns the weeks of a month together with the events and subevents of the organizer taking place in them
+    the result is cached per organizer, month and language unless the request filters events by their attributes
+    :param request: httpRequest of the user, its organizer is the one whose events are shown
+    :param year: the year of the month
+    :param month: the number of the month
+    :return: a dict containing the weeks of the month and whether the events are in multiple timezones
+    """
+    organizer = request.organizer
+    show_availability = bool(organizer.settings.event_list_availability)
+    if has_attribute_filter(request):
+        return build_calendar_month(organizer, year, month, show_availability, request)
+
+    calendar_month = get_cached_calendar_month(organizer.pk, year, month, show_availability)
+    record_cache_lookup('calendar', calendar_month is not None)
+    if calendar_month is None:
+        calendar_month = build_calendar_month(organizer, year, month, show_availability)
+        set_cached_calendar_month(organizer.pk, year, month, show_availability, calendar_month, CALENDAR_CACHE_TTL)
+    return calendar_month
+
+
+def build_calendar_month(organizer, year, month, show_availability, request=None):
+    """
+    calculates the calendar data of a month by only querying the events and subevents overlapping it
+    the events are reduced to the values used by the calendar template, so the result can be cached
+    :param organizer: the organizer whose events are shown
+    :param year: the year of the month
+    :param month: the number of the month
+    :param show_availability: whether the availability of the events is shown in the calendar
+    :param request: httpRequest of the user, only needed to filter events by their attributes
+    :return: a dict containing the weeks of the month and whether the events are in multiple timezones
+    """
+    before, after = get_month_window(year, month)
+    overlapping = Q(Q(date_to__gte=before) & Q(date_from__lte=after)) | \
+        Q(Q(date_to__isnull=True) & Q(date_from__gte=before) & Q(date_from__lte=after))
+
+    events = organizer.events.filter(overlapping, is_public=True, live=True, has_subevents=False)
+    subevents = SubEvent.objects.filter(
+        overlapping, event__organizer=organizer, event__is_public=True, event__live=True, active=True, is_public=True,
+    )
+    if request is not None:
+        events = filter_qs_by_attr(events, request)
+        subevents = filter_qs_by_attr(subevents, request)
+    events = Event.annotated(events).prefetch_related('_settings_objects', 'organizer___settings_objects')
+    subevents = SubEvent.annotated(subevents).select_related('event').prefetch_related(
+        'event___settings_objects', 'event__organizer___settings_objects'
+    )
+
+    # without custom domains the urls are built directly instead of looking up the domain of every single event
+    event_url = eventreverse if organizer.domains.exists() else _reverse_on_main_domain
+
+    events = list(events.order_by('date_from'))
+    subevents = list(subevents.order_by('date_from'))
+    if show_availability:
+        fill_quota_availability(events + subevents)
+
+    events_by_day = defaultdict(list)
+    timezones = set()
+    for event in events:
+        _add_to_days(events_by_day, timezones, event, event, event_url(event, 'presale:event.index'),
+                     before, after, show_availability)
+    for subevent in subevents:
+        url = event_url(subevent.event, 'presale:event.index', kwargs={'subevent': subevent.pk})
+        _add_to_days(events_by_day, timezones, subevent, subevent.event, url, before, after, show_availability)
+
+    calendar.setfirstweekday(0)
+    weeks = [
+        [
+            {'day': day, 'date': date(year, month, day), 'events': events_by_day.get(date(year, month, day))}
+            if day > 0 else None
+            for day in week
+        ]
+        for week in calendar.monthcalendar(year, month)
+    ]
+    return {'weeks': weeks, 'multiple_timezones': len(timezones) > 1}
+
+
+def invalidate_calendar_of_event(organizer_id, *ranges):
+    """
+    removes the cached calendar data of all months in which an event or subevent is shown
+    :param organizer_id: the id of the organizer of the event
+    :param ranges: tuples of the start and the optional end of the event, e.g. before and after it was changed
+    """
+    months = set()
+    for date_from, date_to in ranges:
+        if date_from is None:
+            continue
+        # an event also shows up in the calendars of the neighbouring months if it is close to their border
+        current = (date_from - timedelta(days=1)).date().replace(day=1)
+        last = ((date_to or date_from) + timedelta(days=1)).date()
+        while current <= last:
+            months.add((current.year, current.month))
+            current = (current + timedelta(days=32)).replace(day=1)
+    if months:
+        invalidate_calendar_months(organizer_id, months)
+
+
+def get_next_date(organizer):
+    """
+    returns when the next public event or subevent of an organizer takes place
+    the date is stored with the landing page settings, so the events are only queried again after one of them changed
+    or the stored date has passed
+    :param organizer: the organizer
+    :return: a tuple of the start of the next date and its timezone or (None, '') if there is no upcoming date
+    """
+    state = get_landingpage_state(organizer)
+    if state['next_date'] is not None and (state['next_date'][0] is None or state['next_date'][0] >= now()):
+        return state['next_date']
+
+    date_from, timezone = find_next_date(organizer)
+    # an event changed while searching increases the version, so the outdated result is not stored
+    updated = LandingpageSettings.objects.filter(pk=organizer.pk, events_version=state['events_version']).update(
+        next_date_from=date_from, next_date_timezone=timezone, next_date_version=state['events_version']
+    )
+    if updated:
+        invalidate_landingpage_state(organizer.pk)
+    return date_from, timezone
+
+
+def find_next_date(organizer):
+    """
+    queries the next public event or subevent of an organizer
+    :param organizer: the organizer
+    :return: a tuple of the start of the next date and its timezone or (None, '') if there is no upcoming date
+    """
+    next_event = Event.objects.filter(
+        organizer=organizer,
+        live=True,
+        is_public=True,
+        date_from__gte=now(),
+        has_subevents=False
+    ).order_by('date_from').first()
+    next_subevent = SubEvent.objects.filter(
+        event__organizer=organizer,
+        event__is_public=True,
+        event__live=True,
+        active=True,
+        is_public=True,
+        date_from__gte=now()
+    ).select_related('event').order_by('date_from').first()
+
+    if (next_subevent and not next_event) \
+            or (next_event and next_subevent and next_subevent.date_from < next_event.date_from):
+        return next_subevent.date_from, next_subevent.event.settings.timezone
+    elif next_event:
+        return next_event.date_from, next_event.settings.timezone
+    return None, ''
+
+
+def invalidate_next_date(organizer_id):
+    """
+    marks the stored next date of an organizer as outdated, it is searched again when it is needed the next time
+    :param organizer_id: the id of the organizer
+    """
+    LandingpageSettings.objects.filter(pk=organizer_id).update(events_version=F('events_version') + 1)
+    invalidate_landingpage_state(organizer_id)
+
+
+def _reverse_on_main_domain(event, name, kwargs=None):
+    return mainreverse(name, kwargs=dict(kwargs or {}, organizer=event.organizer.slug, event=event.slug))
+
+
+def _add_to_days(events_by_day, timezones, event, parent, url, before, after, show_availability):
+    settings = parent.settings
+    timezones.add(settings.timezone)
+    tz = pytz.timezone(settings.timezone)
+    datetime_from = event.date_from.astimezone(tz)
+    date_from = datetime_from.date()
+    time = datetime_from.time().replace(tzinfo=None) if settings.show_times else None
+    entry = {
+        'event': _summarize_event(event, settings, show_availability),
+        'url': url,
+        'timezone': settings.timezone,
+    }
+
+    if settings.show_date_to and event.date_to:
+        date_to = event.date_to.astimezone(tz).date()
+        d = max(date_from, before.date())
+        while d <= date_to and d <= after.date():
+            first = d == date_from
+            events_by_day[d].append(dict(entry, continued=not first, time=time if first else None))
+            d += timedelta(days=1)
+    else:
+        events_by_day[date_from].append(dict(entry, continued=False, time=time))
+
+
+def _summarize_event(event, settings, show_availability):
+    # only the attributes used by pretixpresale/fragment_calendar.html, as plain values that can be cached
+    presale_is_running = event.presale_is_running
+    return {
+        'name': str(event.name),
+        'presale_is_running': presale_is_running,
+        'presale_has_ended': event.presale_has_ended,
+        'presale_start': event.presale_start,
+        'best_availability_state': event.best_availability_state if show_availability and presale_is_running else None,
+        'settings': {
+            'waiting_list_enabled': settings.waiting_list_enabled,
+            'presale_start_show_date': settings.presale_start_show_date,
+        },
+    }
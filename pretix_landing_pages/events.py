@@ -0,0 +1,206 @@
+from collections import defaultdict
+
+from django.db.models import Count, Q
+from django.utils.functional import cached_property
+from django.utils.timezone import now
+from django_scopes import scopes_disabled
+from pretix.base.models import (
+    CartPosition, Event, Order, OrderPosition, Quota, Voucher,
+    WaitingListEntry,
+)
+from pretix.base.signals import quota_availability
+
+from .timing import measure
+
+# Number of events that are shown on one page of an event list.
+EVENTS_PER_PAGE = 50
+# Highest page number that is queried. Pages beyond it would be empty anyway, and larger numbers make the offset of
+# the query overflow the integers of the database.
+MAX_PAGE_NUMBER = 10000
+
+
+def get_event_list_queryset(queryset):
+    """
+    prepares a queryset of events for being listed by event_list.html
+    the quotas needed for the availability as well as the settings of the events and their organizer are fetched
+    together with the events, so the number of queries does not grow with the number of listed events
+    :param queryset: a queryset of events
+    :return: the prepared queryset
+    """
+    return Event.annotated(queryset).select_related('organizer').prefetch_related(
+        '_settings_objects', 'organizer___settings_objects'
+    )
+
+
+@scopes_disabled()
+def fill_quota_availability(events):
+    """
+    computes the availability of the active quotas of all events at once
+    pretix computes it with several queries for every single quota unless the availability it cached on the quota is
+    recent, so the results are set as the cached availability of the quota objects, without saving them, and
+    best_availability_state does not query anything afterwards
+    :param events: events or subevents fetched with annotated()
+    """
+    now_dt = now()
+    quotas = [q for e in events for q in e.active_quotas if not q.cache_is_hot(now_dt)]
+    counted = [q for q in quotas if not q.closed and q.size is not None]
+    results = {}
+    for q in quotas:
+        if q.closed:
+            results[q.pk] = Quota.AVAILABILITY_ORDERED, 0
+        elif q.size is None:
+            results[q.pk] = Quota.AVAILABILITY_OK, None
+
+    if counted:
+        quota_ids = [q.pk for q in counted]
+        event_ids = {q.event_id for q in counted}
+        items = defaultdict(set)
+        for quota_id, item_id in Quota.items.through.objects.filter(quota_id__in=quota_ids).values_list(
+                'quota_id', 'item_id'):
+            items[quota_id].add(item_id)
+        variations = defaultdict(set)
+        for quota_id, variation_id in Quota.variations.through.objects.filter(quota_id__in=quota_ids).values_list(
+                'quota_id', 'itemvariation_id'):
+            variations[quota_id].add(variation_id)
+
+        paid, pending = defaultdict(list), defaultdict(list)
+        for row in OrderPosition.objects.filter(
+            order__event_id__in=event_ids, order__status__in=(Order.STATUS_PAID, Order.STATUS_PENDING)
+        ).order_by().values('order__status', 'order__event_id', 'subevent_id', 'item_id', 'variation_id').annotate(
+                count=Count('id')):
+            counts = paid if row['order__status'] == Order.STATUS_PAID else pending
+            counts[row['order__event_id'], row['subevent_id']].append(row)
+
+        vouchers = defaultdict(list)
+        for row in Voucher.objects.filter(
+            Q(valid_until__isnull=True) | Q(valid_until__gte=now_dt), event_id__in=event_ids, block_quota=True
+        ).values('event_id', 'subevent_id', 'item_id', 'variation_id', 'quota_id', 'max_usages', 'redeemed'):
+            row['count'] = max(row['max_usages'] - row['redeemed'], 0)
+            vouchers[row['event_id'], row['subevent_id']].append(row)
+
+        waiting = defaultdict(list)
+        for row in WaitingListEntry.objects.filter(voucher__isnull=True, event_id__in=event_ids).order_by().values(
+                'subevent_id', 'item_id', 'variation_id').annotate(count=Count('id')):
+            waiting[row['subevent_id']].append(row)
+
+        carts = defaultdict(list)
+        for row in CartPosition.objects.filter(
+            Q(voucher__isnull=True) | Q(voucher__block_quota=False) | Q(voucher__valid_until__lt=now_dt),
+            event_id__in=event_ids, expires__gte=now_dt
+        ).order_by().values('event_id', 'subevent_id', 'item_id', 'variation_id').annotate(count=Count('id')):
+            carts[row['event_id'], row['subevent_id']].append(row)
+
+        for q in counted:
+            key = q.event_id, q.subevent_id
+            lookup = items[q.pk], variations[q.pk], q.pk
+            results[q.pk] = _get_availability(q.size, (
+                (_count(paid[key], *lookup), Quota.AVAILABILITY_GONE),
+                (_count(pending[key], *lookup), Quota.AVAILABILITY_ORDERED),
+                (_count(vouchers[key], *lookup), Quota.AVAILABILITY_ORDERED),
+                (_count(waiting[q.subevent_id], *lookup), Quota.AVAILABILITY_ORDERED),
+                (_count(carts[key], *lookup), Quota.AVAILABILITY_RESERVED),
+            ))
+
+    for q in quotas:
+        res = results[q.pk]
+        for recv, resp in quota_availability.send(sender=q.event, quota=q, result=res, count_waitinglist=True):
+            res = resp
+        q.cached_availability_state, q.cached_availability_number = res
+        q.cached_availability_time = now_dt
+
+
+def _count(rows, items, variations, quota_id):
+    # sums up the rows of the same positions and vouchers pretix counts with Quota._position_lookup
+    return sum(
+        row['count'] for row in rows
+        if (row['variation_id'] is None and row['item_id'] in items) or row['variation_id'] in variations
+        or row.get('quota_id') == quota_id
+    )
+
+
+def _get_availability(size, usages):
+    # subtracts the usages in the same order as Quota._availability, which determines the state of a full quota
+    size_left = size
+    for used, state in usages:
+        size_left -= used
+        if size_left <= 0:
+            return state, 0
+    return Quota.AVAILABILITY_OK, size_left
+
+
+class EventPage:
+    """
+    One page of an ordered event list that is handed to the landing page templates.
+    Nothing is queried until a template iterates over the page or accesses one of its properties,
+    and the total number of events is only counted if ``count`` or ``num_pages`` is used.
+    Templates written for the querysets the lists used to be can still index, slice and filter it
+    with ``first``, ``slice``, ``exists`` and ``all``, which only apply to the events of the page.
+    """
+
+    def __init__(self, queryset, request, page_parameter, per_page=EVENTS_PER_PAGE):
+        self.queryset = queryset
+        self.request = request
+        self.page_parameter = page_parameter
+        self.per_page = per_page
+        try:
+            self.number = min(max(int(request.GET.get(page_parameter, 1)), 1), MAX_PAGE_NUMBER)
+        except ValueError:
+            self.number = 1
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, key):
+        return self.object_list[key]
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    @cached_property
+    def _rows(self):
+        # one additional row is fetched to find out whether there is a next page without counting all events
+        offset = (self.number - 1) * self.per_page
+        with measure(self.request, 'events'):
+            rows = list(self.queryset[offset:offset + self.per_page + 1])
+            organizer = getattr(self.request, 'organizer', None)
+            if organizer is not None and organizer.settings.event_list_availability:
+                fill_quota_availability(rows[:self.per_page])
+            return rows
+
+    @cached_property
+    def object_list(self):
+        return self._rows[:self.per_page]
+
+    def exists(self):
+        return bool(self)
+
+    def all(self):
+        return self
+
+    @cached_property
+    def count(self):
+        with measure(self.request, 'events'):
+            return self.queryset.count()
+
+    @property
+    def num_pages(self):
+        return max((self.count + self.per_page - 1) // self.per_page, 1)
+
+    @property
+    def has_next(self):
+        return len(self._rows) > self.per_page
+
+    @property
+    def has_previous(self):
+        return self.number > 1
+
+    @property
+    def next_page_number(self):
+        return self.number + 1
+
+    @property
+    def previous_page_number(self):
+        return self.number - 1
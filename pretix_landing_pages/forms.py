@@ -1,8 +1,11 @@
 from django import forms
 from django.core import validators
+from django.core.exceptions import ValidationError
 from django.utils.translation import ugettext_lazy as _
 
 from .models import LandingpageSettings
+from .template_checks import compile_uploaded_template, find_costly_patterns
+from .uploads import get_bundle_entries
 
 filename_validator = validators.RegexValidator(
     r'^[-a-zA-Z0-9_\.]+\Z',
@@ -11,15 +14,72 @@ filename_validator = validators.RegexValidator(
 )
 
 
+class BundleUploadForm(forms.Form):
+    bundle = forms.FileField(
+        label=_("ZIP bundle:"),
+        help_text=_("A zip file whose files are uploaded at once. The files need to be on the top level of the archive "
+                    "and their names have to follow the rules above."),
+        required=False,
+        validators=[validators.FileExtensionValidator(['zip'])],
+    )
+
+    minify = forms.BooleanField(
+        label=_('Minify'),
+        required=False,
+        help_text=_("If selected, uploaded stylesheets (.css) and scripts (.js) are stored without comments and "
+                    "unnecessary whitespace")
+    )
+
+    def clean_bundle(self):
+        bundle = self.cleaned_data.get('bundle')
+        if bundle:
+            self.bundle_entries = get_bundle_entries(bundle, validators=[filename_validator])
+        else:
+            self.bundle_entries = []
+        return bundle
+
+    def clean(self):
+        """
+        compiles an uploaded index.html, so templates that could not be rendered are rejected with the reason
+        the warnings about costly patterns in the template are stored in template_warnings
+        """
+        cleaned_data = super().clean()
+        self.template_warnings = []
+        contents = []
+        for uploaded_file in self.files.getlist('file_field'):
+            if uploaded_file.name == 'index.html':
+                uploaded_file.seek(0)
+                contents.append(('file_field', uploaded_file.read()))
+        for name, opener in getattr(self, 'bundle_entries', []):
+            if name == 'index.html':
+                with opener() as f:
+                    contents.append(('bundle', f.read()))
+
+        for field, content in contents:
+            try:
+                template = compile_uploaded_template(content)
+            except ValidationError as e:
+                self.add_error(field, e)
+            else:
+                self.template_warnings += find_costly_patterns(template)
+        return cleaned_data
+
+
 class LandingpageSettingsForm(forms.ModelForm):
+    cache_ttl = forms.IntegerField(
+        label=_("Page cache duration"),
+        help_text=_("Number of seconds a rendered landing page is served from the cache. Enter 0 to disable caching."),
+        required=False,
+        min_value=0,
+    )
 
     class Meta:
         model = LandingpageSettings
-        fields = ['active']
+        fields = ['active', 'cache_ttl']
         labels = {'active': _("Use custom landing page")}
 
 
-class LandingpageFilesForm(forms.Form):
+class LandingpageFilesForm(BundleUploadForm):
     file_field = forms.FileField(widget=forms.ClearableFileInput(
         attrs={'multiple': True}),
         help_text=_("The main HTML page needs to be named \"index.html\". "
@@ -35,8 +95,10 @@ class LandingpageFilesForm(forms.Form):
         help_text=_("If selected, uploaded files that already exist will be overwritten")
     )
 
+    field_order = ['file_field', 'bundle', 'minify', 'override_files']
+
 
-class UploadStartingPageForm(forms.Form):
+class UploadStartingPageForm(BundleUploadForm):
     use_startingpage = forms.BooleanField(
         label=_("<strong>Use uploaded starting page</strong>"),
         required=False,
@@ -50,6 +112,8 @@ class UploadStartingPageForm(forms.Form):
         validators=[filename_validator]
     )
 
+    field_order = ['use_startingpage', 'file_field', 'bundle', 'minify']
+
 
 class RedirectForm(forms.Form):
     enable_redirect = forms.BooleanField(
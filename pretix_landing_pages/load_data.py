@@ -0,0 +1,195 @@
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.db.models import AutoField
+from django.utils.timezone import now
+from django_scopes import scopes_disabled
+from pretix.base.models import Event, Organizer, SubEvent
+
+from .models import (
+    LandingpageFile, LandingpageSettings, StartingpageFile,
+    StartingpageSettings, get_startingpage_path, get_upload_path,
+    index_storage,
+)
+
+# The generators below create the data of benchmarks and load tests. All rows are inserted in batches without sending
+# the signals of the models, so the caches of the plugin are not invalidated. They know nothing of the new organizers
+# yet, which is why the generators only ever create new organizers instead of adding to existing ones.
+
+# Number of rows inserted with one query, which also keeps the lists of slugs that are looked up again below the
+# limits of the number of parameters of a query.
+BATCH_SIZE = 500
+
+LANDINGPAGE_TEMPLATE = b"""{% load load_path %}
+<link rel="stylesheet" href="{% load_path "asset0.css" %}">
+{% include "pretixplugins/pretix_landing_pages/event_list.html" with events=upcoming_events %}
+{% include "pretixplugins/pretix_landing_pages/event_list.html" with events=previous_events %}
+{% include "pretixplugins/pretix_landing_pages/calendar.html" %}
+"""
+
+STARTINGPAGE_TEMPLATE = b"""{% load load_path %}
+<link rel="stylesheet" href="{% load_path "asset0.css" %}">
+<img src="{% load_path "missing.png" %}">
+"""
+
+# Asset types in the proportion they are usually uploaded in.
+ASSET_EXTENSIONS = ('css', 'js', 'png', 'jpg', 'png', 'svg')
+
+
+def create_organizers(slugs, active=True, cache_ttl=60, index=LANDINGPAGE_TEMPLATE):
+    """
+    creates organizers with active landing pages that all use the same index.html
+    :param slugs: the slugs of the new organizers
+    :param active: whether the landing pages are active
+    :param cache_ttl: the time in seconds rendered landing pages are cached
+    :param index: the content of the index.html as bytes
+    :return: the new organizers, in the order of their slugs
+    """
+    organizers = []
+    for batch in _batches(slugs):
+        Organizer.objects.bulk_create([Organizer(name="Organizer %s" % slug, slug=slug) for slug in batch])
+        # the ids of bulk inserted rows are not returned by every database
+        created = {organizer.slug: organizer for organizer in Organizer.objects.filter(slug__in=batch)}
+        organizers += [created[slug] for slug in batch]
+
+    settings = []
+    for organizer in organizers:
+        setting = LandingpageSettings(organizer=organizer, active=active, cache_ttl=cache_ttl)
+        setting.index.name = index_storage.save(get_upload_path(setting, 'index.html'), ContentFile(index))
+        settings.append(setting)
+    LandingpageSettings.objects.bulk_create(settings, batch_size=BATCH_SIZE)
+    return organizers
+
+
+def create_startingpage(index=STARTINGPAGE_TEMPLATE):
+    """
+    activates the starting page with the specified index.html
+    :param index: the content of the index.html as bytes
+    :return: the settings of the starting page
+    """
+    setting, _ = StartingpageSettings.objects.get_or_create(pk=1)
+    setting.startingpage_active = True
+    setting.index.name = index_storage.save(get_startingpage_path(setting, 'index.html'), ContentFile(index))
+    setting.template_version += 1
+    setting.save()
+    return setting
+
+
+@scopes_disabled()
+def create_events(organizers, count, past_share=0.5, interval=timedelta(hours=1), rng=None):
+    """
+    creates public events of every organizer, one every interval
+    the events start with the oldest past event, so past_share of them are over and the rest is upcoming
+    :param organizers: the organizers of the events
+    :param count: the number of events of every organizer
+    :param past_share: the share of the events that took place in the past
+    :param interval: the time between the starts of two events
+    :param rng: a random.Random that moves every event to a random time within its interval, or None to start
+    all events half an hour after the beginning of their interval
+    """
+    prototype = Event(name="Event", live=True, is_public=True, currency='EUR')
+    _insert(Event, prototype, (
+        {'organizer': organizer.pk, 'name': "Event %d" % i, 'slug': "event%d" % i, 'date_from': date_from,
+         'date_to': date_from + timedelta(hours=2)}
+        for organizer in organizers
+        for i, date_from in enumerate(_get_dates(count, past_share, interval, rng))
+    ))
+
+
+@scopes_disabled()
+def create_series(organizers, count, subevents, past_share=0.5, interval=timedelta(hours=1), rng=None):
+    """
+    creates public event series of every organizer whose dates are distributed like the events of create_events
+    :param organizers: the organizers of the event series
+    :param count: the number of event series of every organizer
+    :param subevents: the number of dates of every event series
+    :param past_share: the share of the dates that took place in the past
+    :param interval: the time between the starts of two dates of an event series
+    :param rng: a random.Random that moves every date to a random time within its interval, or None
+    :return: the new event series
+    """
+    slugs = ['series%d' % i for i in range(count)]
+    series = []
+    for batch in _batches(organizers):
+        Event.objects.bulk_create([
+            Event(organizer=organizer, name="Series %d" % i, slug=slug, live=True, is_public=True,
+                  has_subevents=True, date_from=now(), currency='EUR')
+            for organizer in batch
+            for i, slug in enumerate(slugs)
+        ])
+        series += Event.objects.filter(organizer__in=batch, slug__in=slugs).order_by('organizer_id', 'pk')
+
+    prototype = SubEvent(name="Date", active=True, is_public=True)
+    _insert(SubEvent, prototype, (
+        {'event': event.pk, 'name': "Date %d" % i, 'date_from': date_from, 'date_to': date_from + timedelta(hours=2)}
+        for event in series
+        for i, date_from in enumerate(_get_dates(subevents, past_share, interval, rng))
+    ))
+    return series
+
+
+def create_assets(count, organizers=None, extensions=ASSET_EXTENSIONS):
+    """
+    creates the rows of uploaded files of every organizer or of the starting page, named asset0.css, asset1.js, ...
+    the files themselves are not written, their urls are looked up from the rows alone
+    :param count: the number of files of every organizer
+    :param organizers: the organizers the files are uploaded for, or None for files of the starting page
+    :param extensions: the extensions the files get in turn
+    """
+    names = ['asset%d.%s' % (i, extensions[i % len(extensions)]) for i in range(count)]
+    if organizers is None:
+        StartingpageFile.objects.bulk_create([
+            StartingpageFile(filename=name, file='templates/starting_pages/%s' % name, content_hash='%064x' % i)
+            for i, name in enumerate(names)
+        ], batch_size=BATCH_SIZE)
+    else:
+        LandingpageFile.objects.bulk_create([
+            LandingpageFile(organizer=organizer, filename=name, content_hash='%064x' % i,
+                            file='templates/landing_pages/%d/%s' % (organizer.id, name))
+            for organizer in organizers
+            for i, name in enumerate(names)
+        ], batch_size=BATCH_SIZE)
+
+
+def _insert(model, prototype, rows):
+    """
+    inserts rows that only differ from a prototype in some of their fields
+    bulk_create prepares every value of every row for the database, which takes most of the time for models with as
+    many fields as events, so the values all rows share are prepared only once
+    :param model: the model of the rows
+    :param prototype: an unsaved instance of the model with the values all rows share
+    :param rows: dicts mapping the names of the fields that differ between the rows to their values
+    """
+    fields = [f for f in model._meta.concrete_fields if not isinstance(f, AutoField)]
+    shared = [f.get_db_prep_save(f.pre_save(prototype, True), connection) for f in fields]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(f.column) for f in fields)
+    placeholders = '(%s)' % ', '.join(['%s'] * len(fields))
+    batch_size = min(BATCH_SIZE, connection.ops.bulk_batch_size(fields, [prototype] * BATCH_SIZE))
+
+    with connection.cursor() as cursor:
+        for batch in _batches(rows, batch_size):
+            params = []
+            for row in batch:
+                values = list(shared)
+                for i, f in enumerate(fields):
+                    if f.name in row:
+                        values[i] = f.get_db_prep_save(row[f.name], connection)
+                params += values
+            cursor.execute('INSERT INTO %s (%s) VALUES %s' % (
+                quote(model._meta.db_table), columns, ', '.join([placeholders] * len(batch))
+            ), params)
+
+
+def _get_dates(count, past_share, interval, rng):
+    start = now() - interval * round(count * past_share)
+    for i in range(count):
+        offset = interval * rng.random() if rng else interval / 2
+        yield start + interval * i + offset
+
+
+def _batches(items, size=BATCH_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils import translation
+from django_scopes import scopes_disabled
+
+from ...models import LandingpageSettings, StartingpageSettings
+from ...views import (
+    ensure_template_version, get_landingpage_context, get_landingpage_state,
+    get_landingpage_template, is_redirect_activated,
+)
+
+# Name of the file in the export directory that records which versions of the pages were exported.
+EXPORT_STATE_FILENAME = '.landing-pages-export.json'
+
+
+class Command(BaseCommand):
+    help = "Render all active landing pages and the starting page to static files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help="The directory the pages are written to")
+        parser.add_argument('--incremental', action='store_true',
+                            help="Only render pages whose template, files or events changed since the last export")
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        os.makedirs(directory, exist_ok=True)
+        previous_state = read_export_state(directory)
+        incremental = options['incremental']
+        state = {}
+
+        with scopes_disabled():
+            setting = StartingpageSettings.objects.filter(pk=1).first()
+            if setting and setting.startingpage_active and setting.index.name and not is_redirect_activated():
+                version = [setting.template_version, setting.assets_version]
+                state['startingpage'] = version
+                if not incremental or previous_state.get('startingpage') != version:
+                    ensure_template_version('starting_pages/index.html', setting.template_version)
+                    write_atomically(get_export_path(directory, 'startingpage', version),
+                                     render_to_string('starting_pages/index.html', request=build_request('/')))
+                    self.stdout.write("Exported the starting page")
+
+            for settings_model in LandingpageSettings.objects.filter(active=True).select_related('organizer'):
+                organizer = settings_model.organizer
+                page_state = get_landingpage_state(organizer)
+                if not page_state['available'] or not page_state['index']:
+                    continue
+                key = str(organizer.id)
+                version = [organizer.slug, page_state['template_version'], page_state['assets_version'],
+                           page_state['events_version']]
+                state[key] = version
+                if incremental and previous_state.get(key) == version:
+                    continue
+
+                request = build_request('/%s/' % organizer.slug, organizer)
+                with translation.override(organizer.settings.locale):
+                    request.LANGUAGE_CODE = translation.get_language()
+                    content = render_to_string(get_landingpage_template(organizer, page_state),
+                                               get_landingpage_context(request, organizer), request=request)
+                write_atomically(get_export_path(directory, key, version), content)
+                self.stdout.write("Exported the landing page of %s" % organizer.slug)
+
+        # pages that were deactivated or moved to another slug since the last export are removed
+        for key, version in previous_state.items():
+            path = get_export_path(directory, key, version)
+            if path != get_export_path(directory, key, state.get(key)) and os.path.exists(path):
+                os.remove(path)
+                self.stdout.write("Removed %s" % path)
+        write_atomically(os.path.join(directory, EXPORT_STATE_FILENAME), json.dumps(state))
+
+
+def build_request(path, organizer=None):
+    """
+    creates the request of an anonymous visitor that the pages are rendered for
+    :param path: the path of the page
+    :param organizer: the organizer of the landing page or None for the starting page
+    :return: an httpRequest
+    """
+    request = RequestFactory(SERVER_NAME=urlparse(settings.SITE_URL).hostname).get(path)
+    request.user = AnonymousUser()
+    request.session = {}
+    if organizer is not None:
+        request.organizer = organizer
+    return request
+
+
+def get_export_path(directory, key, version):
+    if version is None:
+        return None
+    if key == 'startingpage':
+        return os.path.join(directory, 'index.html')
+    return os.path.join(directory, version[0], 'index.html')
+
+
+def read_export_state(directory):
+    try:
+        with open(os.path.join(directory, EXPORT_STATE_FILENAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_atomically(path, content):
+    """
+    writes a file by replacing it with a completely written temporary file, so a web server never serves half of it
+    :param path: the path of the file
+    :param content: the text to write
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(path), delete=False) as f:
+        f.write(content)
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, path)
@@ -0,0 +1,66 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django_scopes import scopes_disabled
+from pretix.base.models import Organizer
+
+from ...load_data import (
+    create_assets, create_events, create_organizers, create_series,
+    create_startingpage,
+)
+
+
+class Command(BaseCommand):
+    help = "Create organizers with landing pages, events and uploaded files to reproduce a large installation"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organizers', type=int, default=1000, help="The number of organizers to create")
+        parser.add_argument('--events', type=int, default=100, help="The number of events of every organizer")
+        parser.add_argument('--series', type=int, default=1, help="The number of event series of every organizer")
+        parser.add_argument('--subevents', type=int, default=50, help="The number of dates of every event series")
+        parser.add_argument('--assets', type=int, default=10, help="The number of uploaded files of every organizer")
+        parser.add_argument('--past-share', type=float, default=0.5,
+                            help="The share of the events and dates that took place in the past")
+        parser.add_argument('--interval', type=float, default=24,
+                            help="The hours between the starts of two events or dates of an organizer")
+        parser.add_argument('--cache-ttl', type=int, default=60, help="The cache time of the landing pages in seconds")
+        parser.add_argument('--prefix', default='load', help="The slugs of the organizers are <prefix>-<number>")
+        parser.add_argument('--seed', type=int, default=None, help="Creates the same dates on every run")
+        parser.add_argument('--startingpage', action='store_true',
+                            help="Also activate the starting page with as many uploaded files")
+
+    def handle(self, *args, **options):
+        if options['organizers'] < 1:
+            raise CommandError("At least one organizer has to be created.")
+        if not 0 <= options['past_share'] <= 1:
+            raise CommandError("The past share has to be between 0 and 1.")
+        if options['interval'] <= 0:
+            raise CommandError("The interval has to be positive.")
+
+        prefix = options['prefix']
+        with scopes_disabled():
+            if Organizer.objects.filter(slug__startswith='%s-' % prefix).exists():
+                raise CommandError("There already are organizers starting with %s-, choose another prefix." % prefix)
+
+        started = time.monotonic()
+        rng = random.Random(options['seed'])
+        interval = timedelta(hours=options['interval'])
+        with transaction.atomic():
+            organizers = create_organizers(['%s-%d' % (prefix, i) for i in range(options['organizers'])],
+                                           cache_ttl=options['cache_ttl'])
+            create_events(organizers, options['events'], options['past_share'], interval, rng)
+            if options['series'] and options['subevents']:
+                create_series(organizers, options['series'], options['subevents'], options['past_share'], interval, rng)
+            create_assets(options['assets'], organizers)
+            if options['startingpage']:
+                create_startingpage()
+                create_assets(options['assets'])
+
+        self.stdout.write("Created %d organizers with %d events, %d event series with %d dates and %d files in %.1f seconds" % (
+            len(organizers), len(organizers) * options['events'], len(organizers) * options['series'],
+            len(organizers) * options['series'] * options['subevents'], len(organizers) * options['assets'],
+            time.monotonic() - started
+        ))
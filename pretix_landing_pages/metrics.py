@@ -0,0 +1,114 @@
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from pretix.base.metrics import Counter, Histogram
+
+_INF = float('inf')
+
+# Cached pages are served within milliseconds, so the buckets start lower than the ones pretix uses for its views.
+PAGE_DURATION_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, _INF)
+FILE_OPERATION_BUCKETS = (.01, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, _INF)
+
+# Like the metrics of pretix, they are only recorded if metrics are enabled in the config file and stored in redis.
+# All labels only take a few fixed values. The organizer label stays empty unless metrics_per_organizer is set in the
+# [pretix_landing_pages] section of the config file, as it adds a time series for every organizer.
+pretix_landing_pages_page_duration_seconds = Histogram(
+    "pretix_landing_pages_page_duration_seconds", "Time to serve a landing page or the starting page.",
+    ["page", "result", "organizer"], buckets=PAGE_DURATION_BUCKETS
+)
+pretix_landing_pages_fallbacks_total = Counter(
+    "pretix_landing_pages_fallbacks_total", "Pages that were replaced by the default pretix page or an older version.",
+    ["page", "reason", "target", "organizer"]
+)
+pretix_landing_pages_cache_lookups_total = Counter(
+    "pretix_landing_pages_cache_lookups_total", "Lookups of rendered pages, templates, calendar months and manifests of uploaded files in the caches.",
+    ["cache", "result"]
+)
+pretix_landing_pages_file_operation_duration_seconds = Histogram(
+    "pretix_landing_pages_file_operation_duration_seconds", "Time to upload or delete uploaded files.",
+    ["page", "operation"], buckets=FILE_OPERATION_BUCKETS
+)
+
+
+def observe_page(page):
+    """
+    decorates the view of a page to record how long serving it took, labelled with the result set by set_page_result
+    :param page: landingpage or startingpage
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not settings.METRICS_ENABLED:
+                return view(request, *args, **kwargs)
+            started = time.monotonic()
+            response = view(request, *args, **kwargs)
+            result = getattr(request, '_landingpage_result', None)
+            if result is not None:
+                pretix_landing_pages_page_duration_seconds.observe(
+                    time.monotonic() - started, page=page, result=result,
+                    organizer=get_organizer_label(getattr(request, 'organizer', None) if page == 'landingpage' else None)
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+def set_page_result(request, result):
+    """
+    records how a page was served, e.g. rendered, cached, not_modified, last_good or default
+    :param request: httpRequest of the user
+    :param result: the label of the result
+    """
+    request._landingpage_result = result
+
+
+def record_fallback(request, page, reason, target, organizer=None):
+    """
+    counts a page that was replaced by the default pretix page or by the last version rendered within the budget
+    :param request: httpRequest of the user
+    :param page: landingpage or startingpage
+    :param reason: inactive or render_budget
+    :param target: default or last_good
+    :param organizer: the organizer of the landing page or None for the starting page
+    """
+    set_page_result(request, target)
+    if settings.METRICS_ENABLED:
+        pretix_landing_pages_fallbacks_total.inc(page=page, reason=reason, target=target,
+                                                 organizer=get_organizer_label(organizer))
+
+
+def record_cache_lookup(cache, hit):
+    """
+    counts a lookup of a rendered page, a compiled template, a calendar month or the manifest of uploaded files in its cache
+    :param cache: page, template, calendar, asset_manifest or srcset_manifest
+    :param hit: whether the cache contained the value
+    """
+    if settings.METRICS_ENABLED:
+        pretix_landing_pages_cache_lookups_total.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+@contextmanager
+def observe_file_operation(page, operation):
+    """
+    records how long uploading or deleting files took
+    :param page: landingpage or startingpage
+    :param operation: upload, delete or delete_all
+    """
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        pretix_landing_pages_file_operation_duration_seconds.observe(time.monotonic() - started, page=page,
+                                                                     operation=operation)
+
+
+def get_organizer_label(organizer):
+    if organizer is None:
+        return ''
+    per_organizer = settings.CONFIG_FILE.getboolean('pretix_landing_pages', 'metrics_per_organizer', fallback=False)
+    return organizer.slug if per_organizer else ''
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.14 on 2026-10-17 22:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pretix_landing_pages', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='landingpagesettings',
+            name='cache_ttl',
+            field=models.PositiveIntegerField(default=60),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.0.14 on 2026-10-17 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pretix_landing_pages', '0004_startingpagesettings_template_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='landingpagefile',
+            name='content_hash',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='startingpagefile',
+            name='content_hash',
+            field=models.CharField(default='', max_length=64),
+        ),
+    ]
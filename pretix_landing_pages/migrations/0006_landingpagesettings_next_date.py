@@ -0,0 +1,33 @@
+# Generated by Django 3.0.14 on 2026-10-17 22:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pretix_landing_pages', '0005_file_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='landingpagesettings',
+            name='events_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='landingpagesettings',
+            name='next_date_from',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='landingpagesettings',
+            name='next_date_timezone',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='landingpagesettings',
+            name='next_date_version',
+            field=models.PositiveIntegerField(null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.0.14 on 2026-10-17 22:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pretix_landing_pages', '0006_landingpagesettings_next_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='landingpagesettings',
+            name='assets_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='startingpagesettings',
+            name='assets_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
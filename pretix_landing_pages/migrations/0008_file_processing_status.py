@@ -0,0 +1,23 @@
+# Generated by Django 3.0.14 on 2026-10-17 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pretix_landing_pages', '0007_assets_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='landingpagefile',
+            name='processing_status',
+            field=models.CharField(default='done', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='startingpagefile',
+            name='processing_status',
+            field=models.CharField(default='done', max_length=10),
+        ),
+    ]
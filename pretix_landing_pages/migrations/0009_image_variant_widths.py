@@ -0,0 +1,23 @@
+# Generated by Django 3.0.14 on 2026-10-17 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pretix_landing_pages', '0008_file_processing_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='landingpagefile',
+            name='variant_widths',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='startingpagefile',
+            name='variant_widths',
+            field=models.CharField(default='', max_length=255),
+        ),
+    ]
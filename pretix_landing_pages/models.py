@@ -2,6 +2,7 @@ import os
 
 from django.core.files.storage import FileSystemStorage
 from django.db import models
+from django.utils.translation import ugettext_lazy as _
 from pretix.base.models import LoggedModel, Organizer
 from pretix.settings import DATA_DIR, MEDIA_ROOT
 
@@ -16,6 +17,26 @@ class OverwriteStorage(FileSystemStorage):
 index_storage = OverwriteStorage(DATA_DIR)
 media_storage = OverwriteStorage(MEDIA_ROOT)
 
+# Suffixes of the precompressed variants that are stored next to compressible uploaded files.
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+
+
+def delete_compressed_variants(file):
+    if file.name:
+        for suffix in COMPRESSED_SUFFIXES:
+            file.storage.delete(file.name + suffix)
+
+
+# Processing states of uploaded files. Fingerprinting and compressing run in a background task after the upload.
+PROCESSING_PENDING = 'pending'
+PROCESSING_DONE = 'done'
+PROCESSING_FAILED = 'failed'
+PROCESSING_STATUS_CHOICES = (
+    (PROCESSING_PENDING, _('Processing')),
+    (PROCESSING_DONE, _('Ready')),
+    (PROCESSING_FAILED, _('Processing failed')),
+)
+
 
 def get_upload_path(instance, filename):
     return os.path.join('templates', 'landing_pages', str(instance.organizer.id), filename)
@@ -25,28 +46,68 @@ def get_startingpage_path(instance, filename):
     return os.path.join('templates', 'starting_pages', filename)
 
 
-class StartingpageSettings(LoggedModel):
+class ExternallyUpdatedFieldsMixin:
+    """
+    Leaves out the fields listed in externally_updated_fields when saving an existing instance.
+    These fields are changed with atomic updates while another request may hold the instance, so saving its outdated
+    values would undo these changes.
+    """
+    externally_updated_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not args and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.externally_updated_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class StartingpageSettings(ExternallyUpdatedFieldsMixin, LoggedModel):
     startingpage_active = models.BooleanField(default=False)
     index = models.FileField(upload_to=get_startingpage_path, null=True, default=None, storage=index_storage)
     redirect_active = models.BooleanField(default=False)
     redirect_link = models.URLField()
+    template_version = models.PositiveIntegerField(default=0)
+    # increased whenever an uploaded file of the starting page changes
+    assets_version = models.PositiveIntegerField(default=0)
 
+    externally_updated_fields = ('assets_version',)
 
-class LandingpageSettings(LoggedModel):
+
+class LandingpageSettings(ExternallyUpdatedFieldsMixin, LoggedModel):
     organizer = models.OneToOneField(Organizer, on_delete=models.CASCADE, primary_key=True)
     active = models.BooleanField(default=False)
     index = models.FileField(upload_to=get_upload_path, null=True, default=None, storage=index_storage)
+    cache_ttl = models.PositiveIntegerField(default=60)
+    template_version = models.PositiveIntegerField(default=0)
+    # increased whenever an uploaded file of the organizer changes
+    assets_version = models.PositiveIntegerField(default=0)
+    # increased whenever an event or subevent of the organizer changes
+    events_version = models.PositiveIntegerField(default=0)
+    # the next public date of the organizer and its timezone, valid as long as next_date_version equals events_version
+    next_date_from = models.DateTimeField(null=True, blank=True)
+    next_date_timezone = models.CharField(max_length=100, blank=True, default='')
+    next_date_version = models.PositiveIntegerField(null=True, blank=True)
+
+    externally_updated_fields = ('assets_version', 'events_version', 'next_date_from', 'next_date_timezone',
+                                 'next_date_version')
 
 
 class LandingpageFile(LoggedModel):
     organizer = models.ForeignKey(Organizer, on_delete=models.CASCADE)
     file = models.FileField(upload_to=get_upload_path, storage=media_storage)
     filename = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+    processing_status = models.CharField(max_length=10, choices=PROCESSING_STATUS_CHOICES, default=PROCESSING_DONE)
+    # comma separated widths of the resized variants of an uploaded image
+    variant_widths = models.CharField(max_length=255, blank=True, default='')
 
     class Meta:
         unique_together = (("organizer", "filename"),)
 
     def delete(self, *args, **kwargs):
+        delete_compressed_variants(self.file)
         self.file.delete(*args, **kwargs)
         super().delete(*args, **kwargs)
 
@@ -54,7 +115,12 @@ class LandingpageFile(LoggedModel):
 class StartingpageFile(LoggedModel):
     file = models.FileField(upload_to=get_startingpage_path, storage=media_storage)
     filename = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+    processing_status = models.CharField(max_length=10, choices=PROCESSING_STATUS_CHOICES, default=PROCESSING_DONE)
+    # comma separated widths of the resized variants of an uploaded image
+    variant_widths = models.CharField(max_length=255, blank=True, default='')
 
     def delete(self, *args, **kwargs):
+        delete_compressed_variants(self.file)
         self.file.delete(*args, **kwargs)
         super().delete(*args, **kwargs)
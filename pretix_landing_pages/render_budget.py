@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import namedtuple
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from django.shortcuts import render
+from django.template.base import Node
+
+# Limits of a single rendering of an uploaded template, unless configured otherwise in the pretix config file.
+# A limit of 0 disables the check.
+DEFAULT_MAX_QUERIES = 250
+DEFAULT_MAX_SECONDS = 10
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+
+RenderBudget = namedtuple('RenderBudget', ['max_queries', 'max_seconds', 'max_bytes'])
+
+
+class RenderBudgetExceeded(Exception):
+    pass
+
+
+class _RenderDeadline(threading.local):
+    # the time limit of the uploaded template that is currently rendered by this thread, if there is one
+    deadline = None
+    max_seconds = None
+
+
+_render_deadline = _RenderDeadline()
+
+
+def install_render_time_check():
+    """
+    makes every template node check the time limit of the uploaded template rendered by the current thread before it
+    is rendered, so templates that loop without querying anything are stopped while they run as well
+    other templates only look up that no uploaded template is being rendered
+    """
+    render_annotated = Node.render_annotated
+    if getattr(render_annotated, 'checks_render_budget', False):
+        return
+
+    @wraps(render_annotated)
+    def render_annotated_within_budget(node, context):
+        deadline = _render_deadline.deadline
+        if deadline is not None and time.monotonic() > deadline:
+            raise RenderBudgetExceeded('longer than %s seconds' % _render_deadline.max_seconds)
+        return render_annotated(node, context)
+
+    render_annotated_within_budget.checks_render_budget = True
+    Node.render_annotated = render_annotated_within_budget
+
+
+def get_render_budget():
+    """
+    returns the limits of a single rendering of an uploaded template
+    they can be configured with render_max_queries, render_max_seconds and render_max_bytes in the
+    [pretix_landing_pages] section of the config file
+    """
+    config = settings.CONFIG_FILE
+    return RenderBudget(
+        max_queries=config.getint('pretix_landing_pages', 'render_max_queries', fallback=DEFAULT_MAX_QUERIES),
+        max_seconds=config.getfloat('pretix_landing_pages', 'render_max_seconds', fallback=DEFAULT_MAX_SECONDS),
+        max_bytes=config.getint('pretix_landing_pages', 'render_max_bytes', fallback=DEFAULT_MAX_BYTES),
+    )
+
+
+def render_within_budget(request, template, context=None):
+    """
+    renders an uploaded template and aborts as soon as it exceeds the number of queries or the time of its budget
+    the time is checked before every query and every template node, but not within a single tag or filter,
+    the size of the output is only checked once the template is rendered
+    :param request: httpRequest of the user
+    :param template: the name of the template
+    :param context: the context the template is rendered with
+    :return: the rendered httpResponse
+    :raise RenderBudgetExceeded: if the rendering exceeded one of the limits
+    """
+    budget = get_render_budget()
+    started = time.monotonic()
+    queries = 0
+
+    def check_budget(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        _check_queries_and_time(budget, queries, started)
+        return execute(sql, params, many, context)
+
+    if budget.max_seconds:
+        _render_deadline.deadline = started + budget.max_seconds
+        _render_deadline.max_seconds = budget.max_seconds
+    try:
+        with connection.execute_wrapper(check_budget):
+            response = render(request, template, context=context)
+    finally:
+        _render_deadline.deadline = None
+    # exceptions raised inside of the template may have been swallowed by a tag, so everything is checked again
+    _check_queries_and_time(budget, queries, started)
+    if budget.max_bytes and len(response.content) > budget.max_bytes:
+        raise RenderBudgetExceeded('the output is larger than %d bytes' % budget.max_bytes)
+    return response
+
+
+def _check_queries_and_time(budget, queries, started):
+    if budget.max_queries and queries > budget.max_queries:
+        raise RenderBudgetExceeded('more than %d queries' % budget.max_queries)
+    if budget.max_seconds and time.monotonic() - started > budget.max_seconds:
+        raise RenderBudgetExceeded('longer than %s seconds' % budget.max_seconds)
@@ -1,16 +1,29 @@
 from _collections import OrderedDict
 from django import forms
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.translation import ugettext as _
+from django_scopes import scopes_disabled
+from pretix.base.models import (
+    Event, Event_SettingsStore, GlobalSettingsObject_SettingsStore, SubEvent,
+)
 from pretix.base.models.organizer import Organizer
 from pretix.base.settings import settings_hierarkey
-from pretix.base.signals import register_global_settings
+from pretix.base.signals import periodic_task, register_global_settings
 from pretix.control.permissions import (
     organizer_permission_required, staff_member_required,
 )
 from pretix.control.signals import nav_global, nav_organizer
 
+from .assets import (
+    FINGERPRINT_COLLECTION_INTERVAL, collect_outdated_fingerprinted_files,
+    invalidate_assets,
+)
+from .cache import invalidate_landingpage_cache, invalidate_landingpage_state
+from .calendar_data import invalidate_calendar_of_event, invalidate_next_date
+from .models import LandingpageFile, LandingpageSettings, StartingpageFile
 from .views import is_plugin_available_for_organizer
 
 
@@ -67,3 +80,92 @@ def register_global_settings(sender, **kwargs):
             help_text=_('If enabled, this option overrides the selection above.')
         ))
     ])
+
+
+@receiver(post_save, sender=Event, dispatch_uid='pretix_landing_pages_event_saved')
+@receiver(post_delete, sender=Event, dispatch_uid='pretix_landing_pages_event_deleted')
+def invalidate_landingpage_on_event_change(sender, instance, **kwargs):
+    """
+    Cached landing pages list the events of their organizer, so they need to be rendered again
+    whenever one of these events changes.
+    """
+    invalidate_landingpage_cache(instance.organizer_id)
+
+
+@receiver(post_save, sender=SubEvent, dispatch_uid='pretix_landing_pages_subevent_saved')
+@receiver(post_delete, sender=SubEvent, dispatch_uid='pretix_landing_pages_subevent_deleted')
+def invalidate_landingpage_on_subevent_change(sender, instance, **kwargs):
+    invalidate_landingpage_cache(instance.event.organizer_id)
+
+
+@receiver(pre_save, sender=Event, dispatch_uid='pretix_landing_pages_event_dates')
+@receiver(pre_save, sender=SubEvent, dispatch_uid='pretix_landing_pages_subevent_dates')
+def remember_previous_dates(sender, instance, **kwargs):
+    """
+    Remembers when a changed event or subevent took place before, as the cached calendar months it was shown in
+    need to be dropped as well as the ones it is shown in now.
+    """
+    instance._landingpage_previous_dates = None
+    if instance.pk:
+        with scopes_disabled():
+            instance._landingpage_previous_dates = sender.objects.filter(pk=instance.pk).values_list(
+                'date_from', 'date_to').first()
+
+
+@receiver(post_save, sender=Event, dispatch_uid='pretix_landing_pages_event_calendar_saved')
+@receiver(post_delete, sender=Event, dispatch_uid='pretix_landing_pages_event_calendar_deleted')
+@receiver(post_save, sender=SubEvent, dispatch_uid='pretix_landing_pages_subevent_calendar_saved')
+@receiver(post_delete, sender=SubEvent, dispatch_uid='pretix_landing_pages_subevent_calendar_deleted')
+def invalidate_calendar_on_event_change(sender, instance, **kwargs):
+    """
+    Drops the cached calendar months showing a changed event or subevent and the stored next date of its organizer.
+    """
+    organizer_id = instance.organizer_id if sender is Event else instance.event.organizer_id
+    ranges = [(instance.date_from, instance.date_to)]
+    if getattr(instance, '_landingpage_previous_dates', None):
+        ranges.append(instance._landingpage_previous_dates)
+    invalidate_calendar_of_event(organizer_id, *ranges)
+    invalidate_next_date(organizer_id)
+
+
+@receiver(post_save, sender=Event_SettingsStore, dispatch_uid='pretix_landing_pages_event_settings_saved')
+@receiver(post_delete, sender=Event_SettingsStore, dispatch_uid='pretix_landing_pages_event_settings_deleted')
+def invalidate_next_date_on_timezone_change(sender, instance, **kwargs):
+    if instance.key == 'timezone':
+        invalidate_next_date(instance.object.organizer_id)
+
+
+@receiver(post_save, sender=LandingpageSettings, dispatch_uid='pretix_landing_pages_settings_saved')
+@receiver(post_delete, sender=LandingpageSettings, dispatch_uid='pretix_landing_pages_settings_deleted')
+def invalidate_state_on_settings_change(sender, instance, **kwargs):
+    invalidate_landingpage_state(instance.pk)
+
+
+@receiver(post_save, sender=GlobalSettingsObject_SettingsStore, dispatch_uid='pretix_landing_pages_global_saved')
+@receiver(post_delete, sender=GlobalSettingsObject_SettingsStore, dispatch_uid='pretix_landing_pages_global_deleted')
+def invalidate_state_on_global_settings_change(sender, instance, **kwargs):
+    """
+    The availability of the plugin is part of the landing page state of every organizer, so all states need to be
+    rebuilt if one of the global settings of this plugin changes.
+    """
+    if instance.key in ('enable_landingpage_individually', 'enable_landingpage_for_all_organizers'):
+        invalidate_landingpage_state(*Organizer.objects.values_list('id', flat=True))
+
+
+# Deleted files are invalidated by the views deleting them. A delete signal would turn the bulk deletion of files into
+# one query per file, as Django has to load every row to send it.
+@receiver(post_save, sender=LandingpageFile, dispatch_uid='pretix_landing_pages_file_saved')
+def invalidate_assets_on_file_change(sender, instance, **kwargs):
+    invalidate_assets(instance.organizer_id)
+
+
+@receiver(post_save, sender=StartingpageFile, dispatch_uid='pretix_landing_pages_startingpage_file_saved')
+def invalidate_assets_on_startingpage_file_change(sender, instance, **kwargs):
+    invalidate_assets(None)
+
+
+@receiver(periodic_task, dispatch_uid='pretix_landing_pages_collect_fingerprinted_files')
+def collect_fingerprinted_files(sender, **kwargs):
+    # the periodic task is sent every few minutes, the first worker to claim the key collects the files for the day
+    if cache.add('pretix_landing_pages:fingerprinted_files_collected', True, FINGERPRINT_COLLECTION_INTERVAL):
+        collect_outdated_fingerprinted_files()
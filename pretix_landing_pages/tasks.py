@@ -0,0 +1,77 @@
+import logging
+
+from pretix.base.services.tasks import ProfiledTask
+from pretix.celery_app import app
+
+from .assets import invalidate_assets, prepare_uploaded_file
+from .cache import invalidate_landingpage_cache
+from .models import (
+    COMPRESSED_SUFFIXES, PROCESSING_DONE, PROCESSING_FAILED, LandingpageFile,
+    StartingpageFile, media_storage,
+)
+from .templatetags.load_path import get_asset_manifest, get_srcset_manifest
+
+logger = logging.getLogger(__name__)
+
+# Number of deleted files that are checked for new uploads with one query.
+REFERENCE_BATCH_SIZE = 400
+
+
+@app.task(base=ProfiledTask)
+def process_uploaded_files(organizer_id, filenames):
+    """
+    fingerprints, compresses and resizes uploaded files after the upload request has been answered
+    until a file is processed, its previous fingerprinted copy or, for a new file, the file itself is served
+    if the processing fails, the file itself is served
+    the processing status of every file is shown on the settings page
+    :param organizer_id: the id of the organizer who uploaded the files or None for the starting page
+    :param filenames: the names of the uploaded files
+    """
+    if organizer_id is None:
+        file_models = list(StartingpageFile.objects.filter(filename__in=filenames))
+    else:
+        file_models = list(LandingpageFile.objects.filter(organizer_id=organizer_id, filename__in=filenames))
+
+    for file_model in file_models:
+        try:
+            prepare_uploaded_file(file_model)
+            file_model.processing_status = PROCESSING_DONE
+        except Exception:
+            logger.exception('Processing of the uploaded file %s failed', file_model.file.name)
+            file_model.processing_status = PROCESSING_FAILED
+            # the copies of a previous upload would be served forever, the file itself is the current content
+            file_model.content_hash = ''
+            file_model.variant_widths = ''
+    file_model_class = StartingpageFile if organizer_id is None else LandingpageFile
+    file_model_class.objects.bulk_update(file_models, ['content_hash', 'variant_widths', 'processing_status'])
+
+    invalidate_assets(organizer_id)
+    if organizer_id is not None:
+        invalidate_landingpage_cache(organizer_id)
+    # the next page view should not have to build the manifests again
+    get_asset_manifest(organizer_id)
+    get_srcset_manifest(organizer_id)
+
+
+@app.task(base=ProfiledTask)
+def delete_stored_files(names):
+    """
+    removes uploaded files and their compressed variants from the media storage
+    their rows are deleted before, so this can run in the background even for thousands of files
+    files uploaded again with the same name in the meantime are stored under the same name, so names that are
+    referenced by a row again are kept
+    fingerprinted copies are left to collect_outdated_fingerprinted_files, as cached pages may still reference them
+    :param names: the names of the files in the media storage
+    """
+    reuploaded = set()
+    # the names are looked up in batches to stay below the limits of the number of parameters of a query
+    for i in range(0, len(names), REFERENCE_BATCH_SIZE):
+        batch = names[i:i + REFERENCE_BATCH_SIZE]
+        reuploaded.update(LandingpageFile.objects.filter(file__in=batch).values_list('file', flat=True).union(
+            StartingpageFile.objects.filter(file__in=batch).values_list('file', flat=True)
+        ))
+    for name in names:
+        if name in reuploaded:
+            continue
+        for variant in (name,) + tuple(name + suffix for suffix in COMPRESSED_SUFFIXES):
+            media_storage.delete(variant)
@@ -0,0 +1,91 @@
+from django.core.exceptions import ValidationError
+from django.template import TemplateSyntaxError, engines
+from django.template.base import VariableNode
+from django.template.defaulttags import ForNode
+from django.template.library import SimpleNode
+from django.template.loader_tags import IncludeNode
+from django.utils.translation import ugettext as _
+
+# Names of the event lists handed to the landing page templates, see views.get_landingpage_context.
+EVENT_LISTS = ('upcoming_events', 'previous_events')
+
+# Attributes of the event lists that count all events of the organizer instead of only the shown page.
+COUNTING_ATTRIBUTES = ('count', 'num_pages')
+
+CALENDAR_TEMPLATE = 'pretixplugins/pretix_landing_pages/calendar.html'
+
+
+def compile_uploaded_template(content):
+    """
+    compiles an uploaded index.html with the django template engine the pages are rendered with
+    :param content: the content of the uploaded file as bytes
+    :return: the compiled template
+    :raise ValidationError: if the file is not utf-8 encoded or the template contains syntax errors or unknown tags
+    """
+    try:
+        source = content.decode('utf-8')
+    except UnicodeDecodeError:
+        raise ValidationError(_('index.html is not encoded in UTF-8.'), code='invalid_encoding')
+    try:
+        return engines['django'].engine.from_string(source)
+    except TemplateSyntaxError as e:
+        token = getattr(e, 'token', None)
+        if token is None or token.lineno is None:  # pragma: no cover
+            raise ValidationError(_('index.html is no valid template: %(error)s'), params={'error': e},
+                                  code='invalid_template')
+        raise ValidationError(_('index.html is no valid template, line %(line)s: %(error)s'),
+                              params={'line': token.lineno, 'error': e}, code='invalid_template')
+
+
+def find_costly_patterns(template):
+    """
+    scans a compiled landing page template for patterns that make every rendering of the page expensive
+    the template is accepted anyway, the findings are shown as warnings to the uploader
+    :param template: a template returned by compile_uploaded_template
+    :return: a list of warning messages
+    """
+    warnings = []
+    nodelist = template.nodelist
+
+    calendar_nodes = _get_calendar_nodes(nodelist)
+    loops_with_calendar = [loop for loop in nodelist.get_nodes_by_type(ForNode) if _get_calendar_nodes(loop.nodelist_loop)]
+    if len(calendar_nodes) > 1 or loops_with_calendar:
+        warnings.append(_('The calendar is loaded more than once, every calendar queries and renders the events '
+                          'of a month again.'))
+
+    for loop in nodelist.get_nodes_by_type(ForNode):
+        for inner_loop in loop.nodelist_loop.get_nodes_by_type(ForNode):
+            event_list = _get_variable_name(inner_loop.sequence)
+            if event_list in EVENT_LISTS:
+                warnings.append(_('Line %(line)s: %(list)s is iterated inside another loop, so its events are '
+                                  'rendered again for every iteration of the outer loop.') % {
+                    'line': inner_loop.token.lineno, 'list': event_list
+                })
+
+    for node in nodelist.get_nodes_by_type(VariableNode):
+        name = _get_variable_name(node.filter_expression)
+        if name and '.' in name:
+            event_list, attribute = name.split('.', 1)
+            if event_list in EVENT_LISTS and attribute in COUNTING_ATTRIBUTES:
+                warnings.append(_('Line %(line)s: %(name)s counts all events of the list on every rendering, '
+                                  'which gets slow with many events.') % {'line': node.token.lineno, 'name': name})
+    # nested loops would report the same finding once for every outer loop
+    return list(dict.fromkeys(warnings))
+
+
+def _get_calendar_nodes(nodelist):
+    return [
+        node for node in nodelist.get_nodes_by_type(SimpleNode) if node.func.__name__ == 'load_calendar_data'
+    ] + [
+        node for node in nodelist.get_nodes_by_type(IncludeNode) if _get_literal(node.template) == CALENDAR_TEMPLATE
+    ]
+
+
+def _get_variable_name(filter_expression):
+    variable = getattr(filter_expression, 'var', None)
+    return getattr(variable, 'var', None)
+
+
+def _get_literal(filter_expression):
+    variable = getattr(filter_expression, 'var', None)
+    return variable if isinstance(variable, str) else None
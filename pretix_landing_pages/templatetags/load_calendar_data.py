@@ -1,8 +1,13 @@
+import calendar
+from datetime import date
+
 import pytz
 from django import template
+from django.http import Http404
 from django.utils.timezone import now
-from pretix.base.models import Event, SubEvent
-from pretix.presale.views.organizer import CalendarView
+
+from ..calendar_data import get_calendar_month, get_month_window, get_next_date
+from ..timing import measure
 
 register = template.Library()
 
@@ -10,20 +15,27 @@ register = template.Library()
 @register.simple_tag(takes_context=True)
 def load_calendar_data(context, request):
     """
-    Calculates the data necessary for using the calendar.html template by using the CalendarView of pretix
+    Calculates the data necessary for using the calendar.html template
+    Only the events of the shown month are queried and the result is cached per month, see calendar_data
     :param context: The context of the calling template
     :param request: The request the caused the rendering of the template
     :return:
     """
-    month, year = _get_month_year(request)
-    cal = CalendarView()
-    cal.request = request
-    cal.year = year
-    cal.month = month
-    context_data = cal.get_context_data()
-
-    desired_attributes = ['years', 'months', 'weeks', 'before', 'after', 'date']
-    context.update({key: value for key, value in context_data.items() if key in desired_attributes})
+    with measure(request, 'calendar'):
+        month, year = _get_month_year(request)
+        try:
+            before, after = get_month_window(year, month)
+        except calendar.IllegalMonthError:
+            raise Http404()
+
+        context.update(get_calendar_month(request, year, month))
+        context.update({
+            'date': date(year, month, 1),
+            'before': before,
+            'after': after,
+            'months': [date(year, i + 1, 1) for i in range(12)],
+            'years': range(now().year - 2, now().year + 3),
+        })
     return context
 
 
@@ -38,32 +50,9 @@ def _get_month_year(request):
 
 
 def _get_month_year_of_next_event(request):
-    next_event = Event.objects.filter(
-        organizer=request.organizer,
-        live=True,
-        is_public=True,
-        date_from__gte=now(),
-        has_subevents=False
-    ).order_by('date_from').first()
-    next_subevent = SubEvent.objects.filter(
-        event__organizer=request.organizer,
-        event__is_public=True,
-        event__live=True,
-        active=True,
-        is_public=True,
-        date_from__gte=now()
-    ).select_related('event').order_by('date_from').first()
-
-    datetime_from = None
-    if (next_subevent and not next_event) \
-            or (next_event and next_subevent and next_subevent.date_from < next_event.date_from):
-        datetime_from = next_subevent.date_from
-        next_event = next_subevent.event
-    elif next_event:
-        datetime_from = next_event.date_from
-
+    datetime_from, timezone = get_next_date(request.organizer)
     if datetime_from:
-        tz = pytz.timezone(next_event.settings.timezone)
+        tz = pytz.timezone(timezone)
         year = datetime_from.astimezone(tz).year
         month = datetime_from.astimezone(tz).month
     else:
@@ -1,22 +1,138 @@
+import hashlib
+from collections import defaultdict
 from urllib.parse import urljoin
 
 from django import template
 from pretix.settings import MEDIA_URL
+from pretix_landing_pages.assets import (
+    BUNDLE_CACHE_TTL, build_bundle, get_image_variant_names, get_public_name,
+)
+from pretix_landing_pages.cache import (
+    get_cached_asset_manifest, get_cached_bundle_name,
+    get_cached_srcset_manifest, set_cached_asset_manifest,
+    set_cached_bundle_name, set_cached_srcset_manifest,
+)
+from pretix_landing_pages.metrics import record_cache_lookup
 from pretix_landing_pages.models import LandingpageFile, StartingpageFile
+from pretix_landing_pages.timing import measure
 
 register = template.Library()
 
 
 @register.simple_tag(takes_context=True)
 def load_path(context, filename):
-    # distinguish between organizer page and starting page
-    if hasattr(context.request, 'organizer'):
-        slug = context.request.organizer.slug
-        file_entry = LandingpageFile.objects.filter(organizer__slug=slug, filename=filename).first()
-        if file_entry is not None:
-            return urljoin(MEDIA_URL, str(file_entry.file))
-    else:
-        file_entry = StartingpageFile.objects.filter(filename=filename).first()
-        if file_entry is not None:
-            return urljoin(MEDIA_URL, str(file_entry.file))
-    return ''
+    return get_request_asset_manifest(context.request).get(filename, '')
+
+
+@register.simple_tag(takes_context=True)
+def load_srcset(context, filename, image_format='webp'):
+    """
+    returns the srcset attribute value listing the resized variants of an uploaded image
+    :param context: the context of the rendered template
+    :param filename: the name of the uploaded image
+    :param image_format: the format of the variants, webp or jpeg
+    :return: e.g. "/media/…/hero-480w.0123456789ab.webp 480w, /media/…/hero-960w.0123456789ab.webp 960w"
+             or an empty string if there are no variants of the file
+    """
+    request = context.request
+    srcsets = getattr(request, '_landingpage_srcset_manifest', None)
+    if srcsets is None:
+        organizer_id = request.organizer.id if hasattr(request, 'organizer') else None
+        with measure(request, 'assets'):
+            srcsets = get_srcset_manifest(organizer_id)
+        try:
+            request._landingpage_srcset_manifest = srcsets
+        except AttributeError:  # pragma: no cover
+            pass
+    return srcsets.get(filename, {}).get(image_format, '')
+
+
+@register.simple_tag(takes_context=True)
+def load_bundle(context, *filenames):
+    """
+    returns the url of one file concatenating the given uploaded stylesheets or scripts in the given order
+    the bundle is created when it is used the first time, a changed file results in a new bundle with a new name
+    :param context: the context of the rendered template
+    :param filenames: the names of the uploaded files, all of them stylesheets or all of them scripts
+    :return: the url of the bundle or an empty string if none of the files exists
+    """
+    request = context.request
+    manifest = get_request_asset_manifest(request)
+    filenames = [filename for filename in filenames if filename in manifest]
+    if not filenames:
+        return ''
+    bundle_hash = hashlib.sha256('\n'.join(manifest[filename] for filename in filenames).encode()).hexdigest()
+    name = get_cached_bundle_name(bundle_hash)
+    if name is None:
+        with measure(request, 'assets'):
+            if hasattr(request, 'organizer'):
+                file_entries = LandingpageFile.objects.filter(organizer_id=request.organizer.id, filename__in=filenames)
+            else:
+                file_entries = StartingpageFile.objects.filter(filename__in=filenames)
+            file_entries = sorted(file_entries, key=lambda file_entry: filenames.index(file_entry.filename))
+            if not file_entries:
+                return ''
+            name = build_bundle(file_entries)
+        set_cached_bundle_name(bundle_hash, name, BUNDLE_CACHE_TTL)
+    return urljoin(MEDIA_URL, name)
+
+
+def get_request_asset_manifest(request):
+    """
+    returns the manifest of the files uploaded for the page that is rendered for the given request
+    the manifest is loaded once per request, so every further lookup is a dictionary access
+    :param request: the request the caused the rendering of the template
+    :return: a dict mapping the filenames to their urls
+    """
+    manifest = getattr(request, '_landingpage_asset_manifest', None)
+    if manifest is None:
+        # distinguish between organizer page and starting page
+        organizer_id = request.organizer.id if hasattr(request, 'organizer') else None
+        with measure(request, 'assets'):
+            manifest = get_asset_manifest(organizer_id)
+        try:
+            request._landingpage_asset_manifest = manifest
+        except AttributeError:  # pragma: no cover
+            pass
+    return manifest
+
+
+def get_asset_manifest(organizer_id):
+    """
+    returns the manifest of the files uploaded by an organizer or for the starting page
+    :param organizer_id: the id of the organizer or None for the starting page
+    :return: a dict mapping the filenames to their urls
+    """
+    manifest = get_cached_asset_manifest(organizer_id)
+    record_cache_lookup('asset_manifest', manifest is not None)
+    if manifest is None:
+        if organizer_id is None:
+            file_entries = StartingpageFile.objects.all()
+        else:
+            file_entries = LandingpageFile.objects.filter(organizer_id=organizer_id)
+        manifest = {file_entry.filename: urljoin(MEDIA_URL, get_public_name(file_entry)) for file_entry in file_entries}
+        set_cached_asset_manifest(organizer_id, manifest)
+    return manifest
+
+
+def get_srcset_manifest(organizer_id):
+    """
+    returns the srcset values of the images uploaded by an organizer or for the starting page
+    :param organizer_id: the id of the organizer or None for the starting page
+    :return: a dict mapping the filenames to dicts mapping the formats of their variants to srcset values
+    """
+    manifest = get_cached_srcset_manifest(organizer_id)
+    record_cache_lookup('srcset_manifest', manifest is not None)
+    if manifest is None:
+        if organizer_id is None:
+            file_entries = StartingpageFile.objects.exclude(variant_widths='')
+        else:
+            file_entries = LandingpageFile.objects.filter(organizer_id=organizer_id).exclude(variant_widths='')
+        manifest = {}
+        for file_entry in file_entries:
+            candidates = defaultdict(list)
+            for image_format, width, name in get_image_variant_names(file_entry):
+                candidates[image_format].append('%s %dw' % (urljoin(MEDIA_URL, name), width))
+            manifest[file_entry.filename] = {image_format: ', '.join(c) for image_format, c in candidates.items()}
+        set_cached_srcset_manifest(organizer_id, manifest)
+    return manifest
@@ -0,0 +1,100 @@
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.dispatch import Signal
+
+landingpage_rendered = Signal(providing_args=['request', 'organizer', 'timings'])
+"""
+This signal is sent after a landing page or the starting page has been served and allows plugins to collect the
+durations and query counts of its phases, e.g. to push them to a monitoring system.
+
+As keyword arguments, the ``request``, the ``organizer`` (None for the starting page) and the ``timings`` are passed.
+``timings`` is an ordered dict mapping the names of the phases (state, events, calendar, assets, render) to
+tuples of their duration in seconds and their number of database queries.
+Phases are nested, e.g. the events are queried while the template is rendered, and missing if they did not happen.
+"""
+
+
+class RenderTimings:
+    """
+    Accumulates the durations and database queries of the phases of serving a page.
+    """
+
+    def __init__(self):
+        self.phases = OrderedDict()
+
+    @contextmanager
+    def measure(self, name):
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        # the phases are listed in the order they started, so enclosing phases come before the phases nested in them
+        self.phases.setdefault(name, (0.0, 0))
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_query):
+                yield
+        finally:
+            duration, count = self.phases[name]
+            self.phases[name] = (duration + time.perf_counter() - started, count + queries)
+
+    def get_server_timing(self):
+        return ', '.join(
+            '%s;dur=%.1f;desc="%d queries"' % (name, duration * 1000, queries)
+            for name, (duration, queries) in self.phases.items()
+        )
+
+
+def start_timings(request):
+    """
+    starts recording the phases of serving a page if they are exposed in a header or a receiver collects them
+    :param request: httpRequest of the user
+    """
+    if _is_server_timing_requested(request) or landingpage_rendered.has_listeners():
+        request._landingpage_timings = RenderTimings()
+
+
+@contextmanager
+def measure(request, name):
+    """
+    records the duration and the database queries of a phase of serving a page, if timings are recorded for the request
+    :param request: httpRequest of the user, e.g. the request of the context of a template tag
+    :param name: the name of the phase
+    """
+    timings = getattr(request, '_landingpage_timings', None)
+    if timings is None:
+        yield
+    else:
+        with timings.measure(name):
+            yield
+
+
+def finish_timings(request, response, organizer):
+    """
+    adds the recorded timings to the response as Server-Timing header for staff members or if configured for everyone
+    and passes them to the receivers of landingpage_rendered
+    :param request: httpRequest of the user
+    :param response: the httpResponse that is served
+    :param organizer: the organizer whose landing page is served or None for the starting page
+    :return: the response
+    """
+    timings = getattr(request, '_landingpage_timings', None)
+    if timings is None:
+        return response
+    if _is_server_timing_requested(request):
+        response['Server-Timing'] = timings.get_server_timing()
+    landingpage_rendered.send(sender=None, request=request, organizer=organizer, timings=timings.phases)
+    return response
+
+
+def _is_server_timing_requested(request):
+    if settings.CONFIG_FILE.getboolean('pretix_landing_pages', 'server_timing', fallback=False):
+        return True
+    return request.user.is_authenticated and request.user.is_staff
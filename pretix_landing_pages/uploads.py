@@ -0,0 +1,145 @@
+import os
+import zipfile
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils.translation import ugettext as _
+
+from .assets import invalidate_assets
+from .metrics import observe_file_operation
+from .models import PROCESSING_PENDING
+from .tasks import process_uploaded_files
+
+try:
+    from rcssmin import cssmin
+    from rjsmin import jsmin
+except ImportError:  # pragma: no cover
+    cssmin = jsmin = None
+
+# Upper limits for uploaded zip bundles, which protect the server against archives that unpack to huge amounts of data.
+MAX_BUNDLE_ENTRIES = 5000
+MAX_BUNDLE_SIZE = 500 * 1024 * 1024
+
+
+def get_bundle_entries(bundle, validators=()):
+    """
+    reads the table of contents of an uploaded zip bundle and validates the names of the files in it
+    the content of the files is not read, it is extracted entry by entry when the files are imported
+    :param bundle: the uploaded zip file
+    :param validators: validators every file name has to pass, e.g. filename_validator
+    :return: a list of (filename, opener) tuples, calling an opener returns a stream of the content of the file
+    :raise ValidationError: if the bundle is no valid zip file, too large or contains invalid file names
+    """
+    try:
+        archive = zipfile.ZipFile(bundle)
+    except (zipfile.BadZipFile, OSError):
+        raise ValidationError(_('The uploaded bundle is not a valid zip file.'), code='invalid')
+
+    infos = [info for info in archive.infolist() if not info.is_dir()]
+    if len(infos) > MAX_BUNDLE_ENTRIES or sum(info.file_size for info in infos) > MAX_BUNDLE_SIZE:
+        raise ValidationError(_('The uploaded bundle contains too many or too large files.'), code='too_large')
+
+    errors = []
+    names = set()
+    for info in infos:
+        if info.filename in names:
+            errors.append(ValidationError(_('%(name)s is contained more than once.'), params={'name': info.filename}))
+        names.add(info.filename)
+        for validator in validators:
+            try:
+                validator(info.filename)
+            except ValidationError as e:
+                errors.append(ValidationError('%s: %s' % (info.filename, ' '.join(e.messages))))
+    if errors:
+        raise ValidationError(errors)
+
+    return [(info.filename, _get_entry_opener(archive, info)) for info in infos]
+
+
+def import_files(entries, file_model_class, settings_model, owner, log_action, user, override=True, minify=False):
+    """
+    stores uploaded files of an organizer or the starting page using a constant number of queries
+    the existing files are looked up at once, the rows are written with bulk operations in one transaction
+    and a single log entry lists all files, fingerprinting and compressing is left to a background task
+    :param entries: a list of (filename, opener) tuples, calling an opener returns a stream of the content of the file
+    :param file_model_class: LandingpageFile or StartingpageFile
+    :param settings_model: the LandingpageSettings or StartingpageSettings the index.html is stored in
+    :param owner: the fields identifying the files of the owner, e.g. {'organizer': organizer}
+    :param log_action: the action type of the log entry written to the settings model
+    :param user: the user who uploaded the files
+    :param override: whether existing files are replaced, otherwise nothing is stored if one of the files exists
+    :param minify: whether stylesheets and scripts are stored minified
+    :return: the names of the uploaded files that already existed
+    """
+    if not entries:
+        return []
+    names = [name for name, __ in entries]
+    existing = {f.filename: f for f in file_model_class.objects.filter(filename__in=names, **owner)}
+    duplicated = sorted(existing) + (['index.html'] if 'index.html' in names and settings_model.index else [])
+    if duplicated and not override:
+        return duplicated
+    created, updated = [], []
+
+    with observe_file_operation('landingpage' if 'organizer' in owner else 'startingpage', 'upload'), \
+            transaction.atomic():
+        for name, opener in entries:
+            with opener() as content:
+                if name == 'index.html':
+                    settings_model.index.save(name, File(content, name=name), save=False)
+                    settings_model.template_version += 1
+                    continue
+
+                file_model = existing.get(name) or file_model_class(filename=name, **owner)
+                file_model.file.save(name, minify_file(name, content) if minify else File(content, name=name), save=False)
+            file_model.processing_status = PROCESSING_PENDING
+            (updated if file_model.pk else created).append(file_model)
+
+        file_model_class.objects.bulk_create(created)
+        file_model_class.objects.bulk_update(updated, ['file', 'processing_status'])
+        settings_model.save()
+        settings_model.log_action(log_action, data={'files': sorted(names)}, user=user)
+
+    organizer_id = owner['organizer'].id if 'organizer' in owner else None
+    # bulk operations do not send the signals that keep the cached file manifest up to date
+    invalidate_assets(organizer_id)
+    if created or updated:
+        process_uploaded_files.apply_async(args=(organizer_id, [f.filename for f in created + updated]))
+    return duplicated
+
+
+def get_uploaded_file_entries(uploaded_files):
+    """
+    turns files uploaded with a form into the entries import_files expects
+    a file uploaded more than once is only stored in its last version
+    :param uploaded_files: a list of UploadedFiles
+    :return: a list of (filename, opener) tuples
+    """
+    return list({f.name: (f.name, _get_uploaded_file_opener(f)) for f in uploaded_files}.values())
+
+
+def minify_file(name, content):
+    """
+    minifies the content of an uploaded stylesheet or script, other files are left unchanged
+    the minifiers are installed with pretix, which uses them for its own static files
+    :param name: the name of the uploaded file
+    :param content: a stream of the content of the file
+    :return: a File with the (minified) content
+    """
+    minifier = {'.css': cssmin, '.js': jsmin}.get(os.path.splitext(name)[1].lower())
+    if minifier is None:
+        return File(content, name=name)
+    minified = minifier(content.read().decode('utf-8', errors='surrogateescape'))
+    return ContentFile(minified.encode('utf-8', errors='surrogateescape'), name=name)
+
+
+def _get_entry_opener(archive, info):
+    return lambda: archive.open(info)
+
+
+def _get_uploaded_file_opener(uploaded_file):
+    def opener():
+        uploaded_file.seek(0)
+        return uploaded_file
+    return opener
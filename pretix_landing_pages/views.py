@@ -1,10 +1,12 @@
+import logging
 import os
 
 from django.contrib import messages
-from django.db.models.functions.datetime import datetime
 from django.http import Http404
 from django.shortcuts import redirect, render
 from django.template.loader import engines
+from django.utils.cache import get_conditional_response
+from django.utils.timezone import now
 from django.utils.translation import ugettext as _
 from django.views import View
 from django.views.generic import TemplateView
@@ -20,14 +22,30 @@ from pretix.control.views.organizer import (
 from pretix.presale.views.organizer import OrganizerIndex
 from pretix.settings import DATA_DIR
 
+from .assets import invalidate_assets
+from .cache import (
+    cache_response, get_cached_landingpage_state, get_cached_response,
+    get_landingpage_etag, get_last_good_response, get_startingpage_etag,
+    invalidate_landingpage_cache, set_cached_landingpage_state, set_etag,
+    set_last_good_response,
+)
+from .events import EventPage, get_event_list_queryset
 from .forms import (
     LandingpageFilesForm, LandingpageSettingsForm, RedirectForm,
     UploadStartingPageForm,
 )
+from .metrics import (
+    observe_file_operation, observe_page, record_cache_lookup, record_fallback,
+    set_page_result,
+)
 from .models import (
     LandingpageFile, LandingpageSettings, StartingpageFile,
     StartingpageSettings,
 )
+from .render_budget import RenderBudgetExceeded, render_within_budget
+from .tasks import delete_stored_files
+from .timing import finish_timings, measure, start_timings
+from .uploads import get_uploaded_file_entries, import_files
 
 """
 The path to the directory that stores the landing page template files.
@@ -39,7 +57,13 @@ template_base_dir = os.path.join(DATA_DIR, 'templates', 'landing_pages')
 # The path to the directory that stores the starting page template files.
 starting_page_base_dir = os.path.join(DATA_DIR, 'templates', 'starting_pages')
 
+logger = logging.getLogger(__name__)
+
+# The versions of the uploaded templates that the template loaders of this worker process have loaded.
+_loaded_template_versions = {}
 
+
+@observe_page('landingpage')
 def organizer_index(request, organizer):
     """
     loads upcoming and previous events for an organization
@@ -54,34 +78,86 @@ def organizer_index(request, organizer):
     except Organizer.DoesNotExist:
         raise Http404(_("The selected organizer was not found."))
     request.organizer = organizer_model
+    start_timings(request)
 
     with scopes_disabled():
-        plugin_available = is_plugin_available_for_organizer(request.organizer)
-        plugin_activated = __plugin_activated_by_organizer(request.organizer)
-        index_available = __index_file_available(request.organizer)
-        if not plugin_available or not plugin_activated or not index_available:
+        with measure(request, 'state'):
+            state = get_landingpage_state(organizer_model)
+        if not state['available'] or not state['active'] or not state['index']:
+            record_fallback(request, 'landingpage', 'inactive', 'default', organizer_model)
             return OrganizerIndex.as_view()(request, kwargs={'organizer': organizer})
 
-        upcoming_events = Event.objects.filter(
-            organizer_id=organizer_model.id,
-            date_from__gt=datetime.now(),
-            live=1,
-            is_public=1
-        )
-        previous_events = Event.objects.filter(
-            organizer_id=organizer_model.id,
-            date_from__lte=datetime.now(),
-            live=1,
-            is_public=1
-        )
+        etag = get_landingpage_etag(request, organizer_model.id, state)
+        if etag:
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                set_page_result(request, 'not_modified')
+                return finish_timings(request, not_modified, organizer_model)
+
+        cached_response = get_cached_response(request, organizer_model.id)
+        if cached_response is not None:
+            set_page_result(request, 'cached')
+            set_etag(request, cached_response, etag)
+            return finish_timings(request, cached_response, organizer_model)
+
+        template = get_landingpage_template(organizer_model, state)
+        try:
+            with measure(request, 'render'):
+                response = render_within_budget(request, template, get_landingpage_context(request, organizer_model))
+        except RenderBudgetExceeded as e:
+            logger.warning('The landing page of %s exceeded its render budget: %s', organizer, e)
+            last_good_response = get_last_good_response(request, organizer_model.id)
+            if last_good_response is not None:
+                record_fallback(request, 'landingpage', 'render_budget', 'last_good', organizer_model)
+                return last_good_response
+            record_fallback(request, 'landingpage', 'render_budget', 'default', organizer_model)
+            return OrganizerIndex.as_view()(request, kwargs={'organizer': organizer})
+        set_page_result(request, 'rendered')
+        cache_response(request, organizer_model.id, response, state['cache_ttl'])
+        set_last_good_response(request, organizer_model.id, response)
+        set_etag(request, response, etag)
+        return finish_timings(request, response, organizer_model)
 
-        context = {
-            'upcoming_events': upcoming_events,
-            'previous_events': previous_events
-        }
-        return render(request, 'landing_pages/%d/index.html' % organizer_model.id, context=context)
+
+def get_landingpage_context(request, organizer):
+    """
+    builds the context the landing page of an organizer is rendered with
+    :param request: httpRequest of the user
+    :param organizer: the organizer
+    :return: a dict containing the pages of upcoming and previous events
+    """
+    upcoming_events = Event.objects.filter(
+        organizer_id=organizer.id,
+        date_from__gt=now(),
+        live=1,
+        is_public=1
+    ).order_by('date_from', 'pk')
+    previous_events = Event.objects.filter(
+        organizer_id=organizer.id,
+        date_from__lte=now(),
+        live=1,
+        is_public=1
+    ).order_by('-date_from', '-pk')
+
+    return {
+        'upcoming_events': EventPage(get_event_list_queryset(upcoming_events), request, 'upcoming_page'),
+        'previous_events': EventPage(get_event_list_queryset(previous_events), request, 'previous_page')
+    }
+
+
+def get_landingpage_template(organizer, state):
+    """
+    returns the name of the uploaded index.html of an organizer and makes sure its current version is loaded
+    :param organizer: the organizer
+    :param state: the landing page state of the organizer
+    :return: the name of the template
+    """
+    template = 'landing_pages/%d/index.html' % organizer.id
+    ensure_template_version(template, state['template_version'])
+    return template
 
 
+@observe_page('startingpage')
 def starting_page_index(request):
     """
     renders the custom starting page of the Pretix installation
@@ -89,19 +165,43 @@ def starting_page_index(request):
     @return: httpResponse containing the custom starting page
     """
     if is_redirect_activated() and get_redirect_link():
+        set_page_result(request, 'redirect')
         return redirect(get_redirect_link())
     else:
         setting, _ = StartingpageSettings.objects.get_or_create(pk=1)
         if setting.index.name and is_startingpage_activated():
-            return render(request, 'starting_pages/index.html')
+            start_timings(request)
+            etag = get_startingpage_etag(request, setting)
+            if etag:
+                not_modified = get_conditional_response(request, etag=etag)
+                if not_modified is not None:
+                    set_page_result(request, 'not_modified')
+                    return finish_timings(request, not_modified, None)
+            ensure_template_version('starting_pages/index.html', setting.template_version)
+            try:
+                with measure(request, 'render'):
+                    response = render_within_budget(request, 'starting_pages/index.html')
+            except RenderBudgetExceeded as e:
+                logger.warning('The starting page exceeded its render budget: %s', e)
+                last_good_response = get_last_good_response(request, None)
+                if last_good_response is not None:
+                    record_fallback(request, 'startingpage', 'render_budget', 'last_good')
+                    return last_good_response
+                record_fallback(request, 'startingpage', 'render_budget', 'default')
+                return TemplateView.as_view(template_name='pretixpresale/index.html')(request)
+            set_page_result(request, 'rendered')
+            set_last_good_response(request, None, response)
+            set_etag(request, response, etag)
+            return finish_timings(request, response, None)
         else:
+            record_fallback(request, 'startingpage', 'inactive', 'default')
             return TemplateView.as_view(template_name='pretixpresale/index.html')(request)
 
 
 class LandingpageSettingsView(OrganizerPermissionRequiredMixin, View):
     """
         handles requests for the settings page of the plugin for an organizer
-        if the status of the landingpage is changed (User clicks on "save", the whole template cache will be invalidated
+        if a new index.html is uploaded, its template version is increased so that every worker reloads the template
     """
     template_name = "landingpage_upload.html"
     permission = 'can_change_organizer_settings'
@@ -123,23 +223,32 @@ class LandingpageSettingsView(OrganizerPermissionRequiredMixin, View):
             settings_model, __ = LandingpageSettings.objects.get_or_create(organizer=request.organizer)
             uploaded_files = file_form.files.getlist('file_field')
             override_files = file_form.cleaned_data['override_files']
-            duplicated_files = self.__save_uploaded_files(request, uploaded_files, override_files, settings_model)
+            entries = get_uploaded_file_entries(uploaded_files) + file_form.bundle_entries
+            duplicated_files = import_files(entries, LandingpageFile, settings_model, {'organizer': request.organizer},
+                                            'pretix_landing_pages.landingpagesettings.files_uploaded', request.user,
+                                            override=override_files, minify=file_form.cleaned_data['minify'])
+
+            for warning in file_form.template_warnings:
+                messages.warning(request, warning)
 
             failed = self.__save_landingpage_settings(request, settings_form, settings_model)
-            """
-            template cache (for the organizer landing page) needs to be reset or else the changes won't be
-            immediately) visible. Might need adoption if there is a different template cache in use than the
-            django default cached loader
-            """
-            # TODO still needed?
-            invalidate_template_in_cache("landing_pages/%d/index.html" % request.organizer.id)
-            uploaded = (len(uploaded_files) > 0) and (not duplicated_files or override_files)
+            invalidate_landingpage_cache(request.organizer.id)
+            uploaded = len(entries) > 0 and (not duplicated_files or override_files)
             duplicated = duplicated_files and not override_files
             file_form = LandingpageFilesForm()
 
         return self.__render_page(request, saved, uploaded, duplicated, failed, file_form)
 
     def __save_landingpage_settings(self, request, settings_form, settings_model):
+        cache_ttl = settings_form.cleaned_data['cache_ttl']
+        if cache_ttl is not None and cache_ttl != settings_model.cache_ttl:
+            settings_model.cache_ttl = cache_ttl
+            settings_model.log_action(
+                action='pretix_landing_pages.landingpagesettings.cache_ttl_changed',
+                data={'cache_ttl': cache_ttl},
+                user=request.user)
+            settings_model.save()
+
         enabled = settings_form.cleaned_data['active']
         index_available = settings_model.index.name
         if index_available or not enabled:
@@ -151,41 +260,19 @@ class LandingpageSettingsView(OrganizerPermissionRequiredMixin, View):
             settings_model.save()
         return enabled and index_available == ''
 
-    def __save_uploaded_files(self, request, uploaded_files, override_files, settings_model):
-        existing_files = LandingpageFile.objects.filter(organizer=request.organizer)
-        uploaded_files_names = list(map(lambda x: x.name, uploaded_files))
-        duplicated_files = (settings_model.index and 'index.html' in uploaded_files_names) \
-            or existing_files.filter(filename__in=uploaded_files_names).count() > 0
-
-        if not duplicated_files or override_files:
-            for f in uploaded_files:
-                # uploaded file is index.html
-                if f.name == 'index.html':
-                    settings_model.index = f
-                    settings_model.log_action('pretix_landing_pages.landingpagesettings.index_updated',
-                                              user=request.user)
-                    settings_model.save()
-                # uploaded file is something else
-                else:
-                    file_model, __ = LandingpageFile.objects.get_or_create(
-                        organizer=request.organizer, filename=f.name)
-                    file_model.file = f
-                    file_model.log_action('pretix_landing_pages.landingpagefile.updated',
-                                          data={'file': f.name}, user=request.user)
-                    file_model.save()
-        return duplicated_files
-
     def __render_page(self, request, saved, uploaded, duplicated, failed, file_form):
         # Load saved settings into form
         settings_model, __ = LandingpageSettings.objects.get_or_create(organizer=request.organizer)
         settings_model.save()
-        settings_form = LandingpageSettingsForm(initial={'active': settings_model.active})
+        settings_form = LandingpageSettingsForm(initial={'active': settings_model.active,
+                                                         'cache_ttl': settings_model.cache_ttl})
 
         # Load information of saved files
         file_models = LandingpageFile.objects.filter(organizer=request.organizer)
-        file_information = [(os.path.splitext(file.filename) + (file.filename,)) for file in file_models]
+        file_information = [(os.path.splitext(file.filename) + (file.filename, file.get_processing_status_display()))
+                            for file in file_models]
         if settings_model.index:
-            file_information += [('index', '.html', 'index.html')]
+            file_information += [('index', '.html', 'index.html', '')]
 
         return render(request, "pretixplugins/pretix_landing_pages/" + self.template_name,
                       {'form': settings_form,
@@ -208,19 +295,22 @@ def delete_all_organizer_files(request, organizer):
     """
     try:
         if request.method == 'POST':
-            files = LandingpageFile.objects.filter(organizer=request.organizer)
-            for f in files:
-                f.log_action('pretix_landing_pages.landingpagefile.deleted',
-                             data={'file': f.filename}, user=request.user)
-                f.delete()
-            settings = LandingpageSettings.objects.get(organizer=request.organizer)
-            settings.log_action('pretix_landing_pages.landingpagesettings.index_deleted', user=request.user)
-            index = settings.index.name
-            settings.index.delete()
-            settings.active = False
-            settings.save()
-            if index or files:
-                messages.success(request, _("Successfully deleted."))
+            with observe_file_operation('landingpage', 'delete_all'):
+                files = delete_files(LandingpageFile.objects.filter(organizer=request.organizer))
+                invalidate_assets(request.organizer.id)
+                invalidate_landingpage_cache(request.organizer.id)
+                settings = LandingpageSettings.objects.get(organizer=request.organizer)
+                if files:
+                    settings.log_action('pretix_landing_pages.landingpagesettings.files_deleted', data={'files': files},
+                                        user=request.user)
+                settings.log_action('pretix_landing_pages.landingpagesettings.index_deleted', user=request.user)
+                index = settings.index.name
+                settings.index.delete()
+                settings.active = False
+                settings.template_version += 1
+                settings.save()
+                if index or files:
+                    messages.success(request, _("Successfully deleted."))
     except:
         messages.error(request, _("Deletion failed."))
 
@@ -239,24 +329,57 @@ def delete_organizer_file(request, organizer, filename):
     """
     try:
         if request.method == 'POST':
-            if filename == 'index.html':
-                settings = LandingpageSettings.objects.get(organizer=request.organizer)
-                settings.log_action('pretix_landing_pages.landingpagesettings.index_deleted', user=request.user)
-                settings.index.delete()
-                settings.active = False
-                settings.save()
-            else:
-                file = LandingpageFile.objects.get(organizer=request.organizer, filename=filename)
-                file.log_action('pretix_landing_pages.landingpagefile.deleted',
-                                data={'file': filename}, user=request.user)
-                file.delete()
-            messages.success(request, _("Successfully deleted."))
+            with observe_file_operation('landingpage', 'delete'):
+                if filename == 'index.html':
+                    settings = LandingpageSettings.objects.get(organizer=request.organizer)
+                    settings.log_action('pretix_landing_pages.landingpagesettings.index_deleted', user=request.user)
+                    settings.index.delete()
+                    settings.active = False
+                    settings.template_version += 1
+                    settings.save()
+                else:
+                    file = LandingpageFile.objects.get(organizer=request.organizer, filename=filename)
+                    file.log_action('pretix_landing_pages.landingpagefile.deleted',
+                                    data={'file': filename}, user=request.user)
+                    file.delete()
+                    invalidate_assets(request.organizer.id)
+                invalidate_landingpage_cache(request.organizer.id)
+                messages.success(request, _("Successfully deleted."))
     except:
         messages.error(request, _("Deletion failed."))
 
     return redirect('plugins:pretix_landing_pages:landingpage_settings', organizer=organizer)
 
 
+def delete_files(files):
+    """
+    deletes uploaded files with a single query, their stored content is removed by a background task
+    :param files: a queryset of LandingpageFiles or StartingpageFiles
+    :return: the sorted names of the deleted files
+    """
+    rows = list(files.values_list('filename', 'file'))
+    # there are no delete signals for uploaded files, so this is a single DELETE statement
+    files.delete()
+    if rows:
+        delete_stored_files.apply_async(args=([name for __, name in rows],))
+    return sorted(filename for filename, __ in rows)
+
+
+def ensure_template_version(template, version):
+    """
+    makes sure that this worker does not render an outdated copy of an uploaded template
+    the cached template loaders only live in the worker process, so each worker remembers the version of every uploaded
+    template it has loaded and drops its own cached copy as soon as the version stored in the database is newer
+    :param template: the name of the template, e.g. starting_pages/index.html
+    :param version: the current version of the template
+    """
+    outdated = _loaded_template_versions.get(template) != version
+    record_cache_lookup('template', not outdated)
+    if outdated:
+        invalidate_template_in_cache(template)
+        _loaded_template_versions[template] = version
+
+
 def invalidate_template_in_cache(template):
     """
     invalidates the specified template in the registers caches
@@ -329,62 +452,45 @@ class StartingpageSettingsView(AdministratorPermissionRequiredMixin, View):
         upload_form = UploadStartingPageForm(request.POST, request.FILES)
         if redirect_form.is_valid() and upload_form.is_valid():
             uploaded_files = upload_form.files.getlist('file_field')
-            if uploaded_files:
+            bundle_entries = upload_form.bundle_entries
+            if uploaded_files or bundle_entries:
                 sth_to_upload = True
             else:
                 sth_to_upload = False
             is_redirecting = redirect_form['enable_redirect'].data
             redirect_link = redirect_form['redirect_link'].data
             is_using_startingpage = upload_form['use_startingpage'].data
+            uploaded_names = [f.name for f in uploaded_files] + [name for name, __ in bundle_entries]
             if self.__check_settings_config_validity(is_redirecting, redirect_link,
-                                                     is_using_startingpage, uploaded_files):
-                self.__upload_all_files(request, uploaded_files)
+                                                     is_using_startingpage, uploaded_names):
+                import_files(get_uploaded_file_entries(uploaded_files) + bundle_entries, StartingpageFile,
+                             StartingpageSettings.objects.get_or_create(pk=1)[0], {},
+                             'pretix_landing_pages.startingpagesettings.files_uploaded', request.user,
+                             minify=upload_form.cleaned_data['minify'])
+                for warning in upload_form.template_warnings:
+                    messages.warning(request, warning)
                 self.__set_redirect_status_and_link(is_redirecting, redirect_link, request.user)
                 self.__set_starting_page(is_using_startingpage, request.user)
                 return True, sth_to_upload
 
+        # the page is rendered with an unbound form, so the reasons for rejecting the upload are shown as messages
+        for field_errors in upload_form.errors.values():
+            for error in field_errors:
+                messages.error(request, error)
         return False, False
 
-    def __check_settings_config_validity(self, is_redirecting, redirect_link, is_using_startingpage, uploaded_files):
+    def __check_settings_config_validity(self, is_redirecting, redirect_link, is_using_startingpage, uploaded_names):
         if is_redirecting and is_using_startingpage:
             return False
         elif is_redirecting and redirect_link == '':
             return False
-        elif is_using_startingpage and uploaded_files:
-            return_val = False
-            for f in uploaded_files:
-                if f.name == "index.html":
-                    return_val = True
-            return return_val
+        elif is_using_startingpage and uploaded_names:
+            return "index.html" in uploaded_names
         elif is_using_startingpage and not self.__get_startingpage_files().__contains__(('index', '.html', 'index.html')):
             return False
         else:
             return True
 
-    @staticmethod
-    def __upload_all_files(request, uploaded_files):
-        settings_model = StartingpageSettings.objects.get_or_create(pk=1)[0]
-        logdata = {}
-        for uf in uploaded_files:
-            if uf.name == 'index.html':
-                logdata[uf.name] = 'updated'
-                settings_model.index = uf
-                settings_model.save()
-                settings_model.log_action(
-                    'pretix_landing_pages.startingpagesettings.index_updated',
-                    data=logdata,
-                    user=request.user)
-            else:
-                file_model, created = StartingpageFile.objects.get_or_create(filename=uf.name)
-                logdata[uf.name] = 'updated'
-                file_model.file = uf
-                file_model.save()
-                file_model.log_action(
-                    'pretix_landing_pages.startingpagefile.updated',
-                    data=logdata,
-                    user=request.user)
-        invalidate_template_in_cache("starting_pages/index.html")
-
     @staticmethod
     def __set_starting_page(setting_bool, user):
         setting = StartingpageSettings.objects.get_or_create(pk=1)[0]
@@ -415,20 +521,22 @@ def delete_all_startingpage_files(request):
     """
     try:
         if request.method == 'POST':
-            files = StartingpageFile.objects.all()
-            for f in files:
-                f.log_action('pretix_landing_pages.startingpagefile.deleted',
-                             data={'file': f.filename}, user=request.user)
-                f.delete()
-            settings = StartingpageSettings.objects.get(pk=1)
-            index = settings.index.name
-            if index:
-                settings.log_action('pretix_landing_pages.startingpagesettings.index_deleted', user=request.user)
-                settings.index.delete()
-                settings.startingpage_active = False
-                settings.save()
-            if index or files:
-                messages.success(request, _("Successfully deleted."))
+            with observe_file_operation('startingpage', 'delete_all'):
+                files = delete_files(StartingpageFile.objects.all())
+                invalidate_assets(None)
+                settings = StartingpageSettings.objects.get(pk=1)
+                if files:
+                    settings.log_action('pretix_landing_pages.startingpagesettings.files_deleted', data={'files': files},
+                                        user=request.user)
+                index = settings.index.name
+                if index:
+                    settings.log_action('pretix_landing_pages.startingpagesettings.index_deleted', user=request.user)
+                    settings.index.delete()
+                    settings.startingpage_active = False
+                    settings.template_version += 1
+                    settings.save()
+                if index or files:
+                    messages.success(request, _("Successfully deleted."))
     except:
         messages.error(request, _("Deletion failed."))
 
@@ -445,19 +553,22 @@ def delete_startingpage_file(request, filename):
     """
     try:
         if request.method == 'POST':
-            if filename == 'index.html':
-                settings = StartingpageSettings.objects.get(pk=1)
-                if settings.index.name:
-                    settings.log_action('pretix_landing_pages.startingpagesettings.index_deleted', user=request.user)
-                    settings.index.delete()
-                    settings.startingpage_active = False
-                    settings.save()
-            else:
-                file = StartingpageFile.objects.get(filename=filename)
-                file.log_action('pretix_landing_pages.startingpagefile.deleted',
-                                data={'file': filename}, user=request.user)
-                file.delete()
-            messages.success(request, _("Successfully deleted."))
+            with observe_file_operation('startingpage', 'delete'):
+                if filename == 'index.html':
+                    settings = StartingpageSettings.objects.get(pk=1)
+                    if settings.index.name:
+                        settings.log_action('pretix_landing_pages.startingpagesettings.index_deleted', user=request.user)
+                        settings.index.delete()
+                        settings.startingpage_active = False
+                        settings.template_version += 1
+                        settings.save()
+                else:
+                    file = StartingpageFile.objects.get(filename=filename)
+                    file.log_action('pretix_landing_pages.startingpagefile.deleted',
+                                    data={'file': filename}, user=request.user)
+                    file.delete()
+                    invalidate_assets(None)
+                messages.success(request, _("Successfully deleted."))
     except:
         messages.error(request, _("Deletion failed."))
 
@@ -483,14 +594,39 @@ def get_redirect_link():
 
 
 def is_plugin_available_for_organizer(organizer):
-    individually_activated = str(organizer.id) in GlobalSettingsObject().settings.get('enable_landingpage_individually')
-    globally_activated = GlobalSettingsObject().settings.get('enable_landingpage_for_all_organizers')
-    return individually_activated or globally_activated
+    global_settings = GlobalSettingsObject().settings
+    return global_settings.get('enable_landingpage_for_all_organizers') \
+        or str(organizer.id) in global_settings.get('enable_landingpage_individually')
 
 
-def __index_file_available(organizer):
-    return LandingpageSettings.objects.get_or_create(pk=organizer.id)[0].index.name
-
-
-def __plugin_activated_by_organizer(organizer):
-    return LandingpageSettings.objects.get_or_create(pk=organizer.id)[0].active
+def get_landingpage_state(organizer):
+    """
+    returns the precomputed state of the landing page of an organizer
+    the state is kept in the shared cache and rebuilt whenever the global settings or the landing page settings change
+    :param organizer: the organizer
+    :return: a dict containing whether the plugin is available and activated, the name of the index file,
+        the template version, the cache duration, the versions of the uploaded files and the events
+        and the next public date if it is known
+    """
+    state = get_cached_landingpage_state(organizer.id)
+    if state is None:
+        state = __build_landingpage_state(organizer)
+        set_cached_landingpage_state(organizer.id, state)
+    return state
+
+
+def __build_landingpage_state(organizer):
+    settings_model = LandingpageSettings.objects.filter(pk=organizer.id).first()
+    if settings_model is None:
+        settings_model = LandingpageSettings(organizer=organizer)
+    return {
+        'available': bool(is_plugin_available_for_organizer(organizer)),
+        'active': settings_model.active,
+        'index': settings_model.index.name or '',
+        'template_version': settings_model.template_version,
+        'cache_ttl': settings_model.cache_ttl,
+        'assets_version': settings_model.assets_version,
+        'events_version': settings_model.events_version,
+        'next_date': (settings_model.next_date_from, settings_model.next_date_timezone)
+        if settings_model.next_date_version == settings_model.events_version else None,
+    }
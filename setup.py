@@ -41,6 +41,9 @@ setup(
     ],
 
     install_requires=[],
+    extras_require={
+        'brotli': ['brotli'],
+    },
     packages=find_packages(exclude=['tests', 'tests.*']),
     include_package_data=True,
     cmdclass=cmdclass,
@@ -0,0 +1,46 @@
+import pytest
+from pretix_landing_pages import load_data
+
+# Scales the benchmarks run at, see README section "Benchmarks".
+EVENT_SCALES = (1, 100, 10000)
+ASSET_SCALES = (1, 50, 500)
+SUBEVENT_SCALE = 2000
+
+
+def pytest_collection_modifyitems(config, items):
+    # generating tens of thousands of rows takes a while, so the benchmarks only run when they are asked for
+    if config.getoption('benchmark_only', False):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark-only")
+    for item in items:
+        if 'benchmark' in getattr(item, 'fixturenames', ()):
+            item.add_marker(skip)
+
+
+def create_organizer(slug='bench', active=True, cache_ttl=0):
+    return load_data.create_organizers([slug], active=active, cache_ttl=cache_ttl)[0]
+
+
+def create_events(organizer, count):
+    """
+    creates public events spread around the current date, half of them in the past and half of them in the future
+    """
+    load_data.create_events([organizer], count)
+
+
+def create_series(organizer, count):
+    """
+    creates one public event series whose dates take place every hour starting in half an hour
+    """
+    return load_data.create_series([organizer], 1, count, past_share=0)[0]
+
+
+def create_assets(count, organizer=None):
+    """
+    creates the rows of uploaded stylesheets, the files themselves are not needed to look up their urls
+    """
+    load_data.create_assets(count, None if organizer is None else [organizer], extensions=('css',))
+
+
+def create_startingpage():
+    return load_data.create_startingpage()
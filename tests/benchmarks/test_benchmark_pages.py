@@ -0,0 +1,50 @@
+import pytest
+
+from .conftest import (
+    ASSET_SCALES, EVENT_SCALES, SUBEVENT_SCALE, create_assets, create_events,
+    create_organizer, create_series, create_startingpage,
+)
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('events', EVENT_SCALES)
+def test_organizer_index(client, benchmark, events):
+    organizer = create_organizer()
+    create_events(organizer, events)
+    create_assets(10, organizer)
+    benchmark.extra_info['events'] = events
+
+    response = benchmark(client.get, '/bench/')
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_organizer_index_with_series(client, benchmark):
+    organizer = create_organizer()
+    create_series(organizer, SUBEVENT_SCALE)
+    benchmark.extra_info['subevents'] = SUBEVENT_SCALE
+
+    response = benchmark(client.get, '/bench/')
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_organizer_index_cached(client, benchmark, locmem_cache):
+    organizer = create_organizer(cache_ttl=3600)
+    create_events(organizer, EVENT_SCALES[-1])
+
+    response = benchmark(client.get, '/bench/')
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('assets', ASSET_SCALES)
+def test_starting_page_index(client, benchmark, assets):
+    create_startingpage()
+    create_assets(assets)
+    benchmark.extra_info['assets'] = assets
+
+    response = benchmark(client.get, '/')
+    assert response.status_code == 200
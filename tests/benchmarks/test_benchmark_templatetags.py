@@ -0,0 +1,65 @@
+import pytest
+from django.test import RequestFactory
+from django_scopes import scopes_disabled
+from pretix_landing_pages.templatetags.load_calendar_data import (
+    load_calendar_data,
+)
+from pretix_landing_pages.templatetags.load_path import load_path
+
+from .conftest import (
+    ASSET_SCALES, EVENT_SCALES, SUBEVENT_SCALE, create_assets, create_events,
+    create_organizer, create_series,
+)
+
+pytest.importorskip('pytest_benchmark')
+
+
+class ContextMock(dict):
+    def __init__(self, request):
+        super().__init__()
+        self.request = request
+
+
+def get_request(organizer):
+    request = RequestFactory().get('/bench/')
+    request.organizer = organizer
+    request.session = {}
+    return request
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('assets', ASSET_SCALES)
+def test_load_path(benchmark, assets):
+    organizer = create_organizer()
+    create_assets(assets, organizer)
+    benchmark.extra_info['assets'] = assets
+
+    def load_paths():
+        # every rendering starts with a new request, whose first lookup loads the manifest
+        context = ContextMock(get_request(organizer))
+        return [load_path(context, 'asset%d.css' % i) for i in range(min(assets, 20))]
+
+    assert all(benchmark(load_paths))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('events', EVENT_SCALES)
+def test_load_calendar_data(benchmark, events):
+    organizer = create_organizer()
+    create_events(organizer, events)
+    benchmark.extra_info['events'] = events
+
+    with scopes_disabled():
+        context = benchmark(lambda: load_calendar_data(ContextMock(get_request(organizer)), get_request(organizer)))
+    assert context['weeks']
+
+
+@pytest.mark.django_db
+def test_load_calendar_data_with_series(benchmark):
+    organizer = create_organizer()
+    create_series(organizer, SUBEVENT_SCALE)
+    benchmark.extra_info['subevents'] = SUBEVENT_SCALE
+
+    with scopes_disabled():
+        context = benchmark(lambda: load_calendar_data(ContextMock(get_request(organizer)), get_request(organizer)))
+    assert any(day and day['events'] for week in context['weeks'] for day in week)
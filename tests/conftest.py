@@ -0,0 +1,21 @@
+import pytest
+from django.core.cache import cache
+from pretix_landing_pages import views
+
+
+@pytest.fixture(autouse=True)
+def reset_loaded_template_versions(monkeypatch):
+    # The database is reset after every test, so template versions repeat while the template cache of the process does not
+    monkeypatch.setattr(views, '_loaded_template_versions', {})
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    # The test settings disable caching, which hides the pages, manifests and states cached by the plugin as well as
+    # the domains pretix caches for event urls
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    cache.clear()
@@ -1,4 +1,9 @@
+import io
+import zipfile
+
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now
 
 
@@ -11,3 +16,17 @@ def __login_as_admin(env, client, admin_session):
 
 def __get_upload_file(name, content):
     return SimpleUploadedFile(name, content=content, content_type="text/plain")
+
+
+def __get_zip_file(name, files):
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, 'w') as archive:
+        for filename, file_content in files.items():
+            archive.writestr(filename, file_content)
+    return SimpleUploadedFile(name, content=content.getvalue(), content_type="application/zip")
+
+
+def __count_queries(func, *args, **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        func(*args, **kwargs)
+    return len(context.captured_queries)
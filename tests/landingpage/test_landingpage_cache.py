@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils.timezone import now
+from pretix.base.models import Event, Organizer, Team, User
+from pretix_landing_pages.models import LandingpageSettings
+
+from ..helper_methods import __login_as_admin
+
+
+@pytest.fixture
+def env(locmem_cache):
+    admin = User.objects.create_superuser(email="admin@localhost", password="admin")
+    organizer = Organizer.objects.create(name="Cached Organizer", slug="cached")
+    setting = LandingpageSettings.objects.create(organizer=organizer, active=True)
+    setting.index = SimpleUploadedFile('index.html', content=b"<html><body>First version</body></html>")
+    setting.save()
+    t = Team.objects.create(organizer=organizer, can_change_organizer_settings=True)
+    t.members.add(admin)
+    return organizer, admin, setting
+
+
+@pytest.mark.django_db
+def test_response_is_served_from_cache(env, client):
+    r = client.get('/cached/')
+    assert r.templates[0].name == 'landing_pages/%d/index.html' % env[0].id
+
+    r = client.get('/cached/')
+    assert r.status_code == 200
+    assert not r.templates
+    assert b"First version" in r.content
+
+
+@pytest.mark.django_db
+def test_cache_is_keyed_by_month_and_year(env, client):
+    client.get('/cached/')
+    r = client.get('/cached/?month=5&year=2019')
+    assert r.templates
+    r = client.get('/cached/?month=5&year=2019&unrelated=1')
+    assert not r.templates
+
+
+@pytest.mark.django_db
+def test_pages_filtered_by_attributes_are_not_cached(env, client):
+    client.get('/cached/?attr[type]=workshop')
+    assert client.get('/cached/').templates
+    assert client.get('/cached/?attr[type]=workshop').templates
+
+
+@pytest.mark.django_db
+def test_pages_filtered_by_session_are_not_served_from_cache(env, client):
+    client.get('/cached/')
+    session = client.session
+    session['filter_qs_by_attr_%d_' % env[0].pk] = 'attr[type]=workshop'
+    session.save()
+    assert client.get('/cached/').templates
+    assert client.get('/cached/').templates
+
+
+@pytest.mark.django_db
+def test_upload_invalidates_cache(env, client):
+    client.get('/cached/')
+
+    __login_as_admin(env, client, False)
+    index = SimpleUploadedFile('index.html', content=b"<html><body>Second version</body></html>")
+    client.post('/control/organizer/cached/landingpage/', data={'active': 'on', 'file_field': [index],
+                                                                'override_files': 'on'})
+    client.logout()
+
+    r = client.get('/cached/')
+    assert r.templates
+    assert b"Second version" in r.content
+
+
+@pytest.mark.django_db
+def test_event_change_invalidates_cache(env, client):
+    client.get('/cached/')
+    Event.objects.create(organizer=env[0], name="New event", slug="new", live=True,
+                         date_from=now() + timedelta(days=3))
+
+    r = client.get('/cached/')
+    assert r.templates
+
+
+@pytest.mark.django_db
+def test_cache_disabled_by_ttl(env, client):
+    env[2].cache_ttl = 0
+    env[2].save()
+    client.get('/cached/')
+
+    r = client.get('/cached/')
+    assert r.templates
+
+
+@pytest.mark.django_db
+def test_cache_ttl_is_saved(env, client):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/cached/landingpage/', data={'active': 'on', 'cache_ttl': '300'})
+    assert LandingpageSettings.objects.get(pk=env[0]).cache_ttl == 300
+
+
+@pytest.mark.django_db
+def test_unchanged_page_is_not_modified(env, client, django_assert_num_queries):
+    etag = client.get('/cached/')['ETag']
+    assert etag
+
+    with django_assert_num_queries(1):
+        r = client.get('/cached/', HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 304
+    assert client.get('/cached/?month=5&year=2019', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_filtered_page_is_not_validated_by_etag(env, client):
+    etag = client.get('/cached/')['ETag']
+    r = client.get('/cached/?attr[type]=workshop', HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 200
+    assert not r.has_header('ETag')
+
+    session = client.session
+    session['filter_qs_by_attr_%d_' % env[0].pk] = 'attr[type]=workshop'
+    session.save()
+    r = client.get('/cached/', HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 200
+    assert not r.has_header('ETag')
+
+
+@pytest.mark.django_db
+def test_etag_changes_with_events_and_files(env, client):
+    etag = client.get('/cached/')['ETag']
+    Event.objects.create(organizer=env[0], name="Event", slug="event", live=True, date_from=now() + timedelta(days=1))
+    r = client.get('/cached/', HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 200
+    assert r['ETag'] != etag
+
+    etag = r['ETag']
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/cached/landingpage/',
+                data={'active': 'on', 'file_field': [SimpleUploadedFile('style.css', content=b"a{}")]})
+    client.logout()
+    r = client.get('/cached/', HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 200
+    assert r['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_no_etag_without_cache_ttl(env, client):
+    env[2].cache_ttl = 0
+    env[2].save()
+    assert not client.get('/cached/').has_header('ETag')
@@ -0,0 +1,188 @@
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from django_scopes import scope, scopes_disabled
+from pretix.base.models import (
+    CartPosition, Event, Order, OrderPosition, Organizer, Quota,
+)
+from pretix_landing_pages.events import (
+    MAX_PAGE_NUMBER, EventPage, fill_quota_availability,
+)
+from pretix_landing_pages.models import LandingpageSettings
+
+
+@pytest.fixture
+def env():
+    organizer = Organizer.objects.create(name="Busy Organizer", slug="busy")
+    setting = LandingpageSettings.objects.create(organizer=organizer, active=True)
+    content = b"{% for e in upcoming_events %}{{ e.slug }};{% endfor %}|{{ upcoming_events.count }}"
+    setting.index = SimpleUploadedFile('index.html', content=content)
+    setting.save()
+    for i in range(5):
+        Event.objects.create(organizer=organizer, name="Upcoming %d" % i, slug="up%d" % i, live=True,
+                             date_from=now() + timedelta(days=5 - i))
+        Event.objects.create(organizer=organizer, name="Previous %d" % i, slug="prev%d" % i, live=True,
+                             date_from=now() - timedelta(days=i + 1))
+    return organizer, setting
+
+
+@pytest.mark.django_db
+def test_event_page_is_lazy(env, django_assert_num_queries):
+    request = RequestFactory().get('/busy/')
+    with scopes_disabled():
+        with django_assert_num_queries(0):
+            page = EventPage(Event.objects.order_by('date_from'), request, 'upcoming_page', per_page=3)
+
+        with django_assert_num_queries(1):
+            assert len(list(page)) == 3
+            assert page.has_next
+            assert not page.has_previous
+
+        with django_assert_num_queries(1):
+            assert page.count == 10
+            assert page.num_pages == 4
+
+
+@pytest.mark.django_db
+def test_event_page_number_from_request(env):
+    with scopes_disabled():
+        queryset = Event.objects.order_by('date_from')
+        page = EventPage(queryset, RequestFactory().get('/busy/?upcoming_page=4'), 'upcoming_page', per_page=3)
+        assert len(page) == 1
+        assert not page.has_next
+        assert page.has_previous
+        assert page.previous_page_number == 3
+
+        page = EventPage(queryset, RequestFactory().get('/busy/?upcoming_page=abc'), 'upcoming_page', per_page=3)
+        assert page.number == 1
+
+
+@pytest.mark.django_db
+def test_oversized_page_number_is_clamped(env, client):
+    with scopes_disabled():
+        page = EventPage(Event.objects.order_by('date_from'),
+                         RequestFactory().get('/busy/?upcoming_page=99999999999999999999999'), 'upcoming_page')
+        assert page.number == MAX_PAGE_NUMBER
+        assert not page
+        assert page.has_previous
+
+    r = client.get('/busy/?upcoming_page=99999999999999999999999')
+    assert r.status_code == 200
+    assert r.content.decode() == "|5"
+
+
+@pytest.mark.django_db
+def test_event_lists_can_be_used_like_querysets(env, client):
+    env[1].index.delete()
+    env[1].index = SimpleUploadedFile('index.html', content=(
+        b"{{ upcoming_events|first }};{% for e in upcoming_events|slice:':2' %}{{ e.slug }},{% endfor %};"
+        b"{{ upcoming_events.0.slug }};{{ previous_events|last }};{{ upcoming_events|length }};"
+        b"{% if upcoming_events.exists %}yes{% endif %};{% for e in previous_events.all %}{{ e.slug }},{% endfor %}"
+    ))
+    env[1].template_version += 1
+    env[1].save()
+    r = client.get('/busy/')
+    assert r.status_code == 200
+    assert r.content.decode() == "Upcoming 4;up4,up3,;up4;Previous 4;5;yes;prev0,prev1,prev2,prev3,prev4,"
+
+
+@pytest.mark.django_db
+def test_landingpage_events_are_ordered(env, client):
+    r = client.get('/busy/')
+    assert r.content.decode() == "up4;up3;up2;up1;up0;|5"
+    assert [e.slug for e in r.context['previous_events']] == ['prev0', 'prev1', 'prev2', 'prev3', 'prev4']
+
+
+@pytest.mark.django_db
+def test_event_list_queries_do_not_grow_with_events(env, client, locmem_cache):
+    env[1].index.delete()
+    env[1].index = SimpleUploadedFile(
+        'index.html', content=b'{% include "pretixplugins/pretix_landing_pages/event_list.html" with events=upcoming_events %}'
+    )
+    env[1].template_version += 1
+    env[1].cache_ttl = 0
+    env[1].save()
+    with scopes_disabled():
+        upcoming_events = list(Event.objects.filter(organizer=env[0], date_from__gt=now()))
+    for event in upcoming_events:
+        _put_on_sale(event)
+
+    client.get('/busy/')
+    _cool_down_quotas()
+    with CaptureQueriesContext(connection) as few_events:
+        r = client.get('/busy/')
+    assert r.content.count(b"Book now") == 5
+
+    for i in range(20):
+        _put_on_sale(Event.objects.create(organizer=env[0], name="More %d" % i, slug="more%d" % i, live=True,
+                                          date_from=now() + timedelta(days=10 + i)))
+    client.get('/busy/')
+    _cool_down_quotas()
+    with CaptureQueriesContext(connection) as many_events:
+        r = client.get('/busy/')
+    assert r.content.count(b"Book now") == 25
+    assert len(many_events.captured_queries) == len(few_events.captured_queries)
+
+
+@pytest.mark.django_db
+def test_quota_availability_is_computed_like_pretix(env):
+    with scopes_disabled():
+        event = Event.objects.get(organizer=env[0], slug='up0')
+    item = _put_on_sale(event)
+    with scope(organizer=env[0]):
+        shirt = event.items.create(name="Shirt", default_price=10)
+        small = shirt.variations.create(value="S")
+        quotas = {
+            'sold_out': event.quotas.create(name="Sold out", size=2),
+            'pending': event.quotas.create(name="Pending", size=3),
+            'in_carts': event.quotas.create(name="In carts", size=4),
+            'closed': event.quotas.create(name="Closed", size=10, closed=True),
+        }
+        for quota in quotas.values():
+            quota.items.add(item)
+        quotas['variation'] = event.quotas.create(name="Variation", size=3)
+        quotas['variation'].items.add(shirt)
+        quotas['variation'].variations.add(small)
+        for status, count in ((Order.STATUS_PAID, 2), (Order.STATUS_PENDING, 1), (Order.STATUS_CANCELED, 5)):
+            order = Order.objects.create(event=event, status=status, email='a@example.org', total=10 * count,
+                                         expires=now() + timedelta(days=1))
+            for i in range(count):
+                OrderPosition.objects.create(order=order, item=item, price=10)
+        CartPosition.objects.create(event=event, item=item, price=10, expires=now() + timedelta(minutes=10))
+        CartPosition.objects.create(event=event, item=shirt, variation=small, price=10,
+                                    expires=now() + timedelta(minutes=10))
+        CartPosition.objects.create(event=event, item=item, price=10, expires=now() - timedelta(minutes=10))
+        expected = {quota.pk: quota.availability() for quota in event.quotas.all()}
+
+        _cool_down_quotas()
+        events = list(Event.annotated(Event.objects.filter(pk=event.pk)))
+        with CaptureQueriesContext(connection) as queries:
+            fill_quota_availability(events)
+            availability = {quota.pk: quota.availability(allow_cache=True) for quota in events[0].active_quotas}
+    assert availability == expected
+    assert availability[quotas['sold_out'].pk] == (Quota.AVAILABILITY_GONE, 0)
+    assert availability[quotas['pending'].pk] == (Quota.AVAILABILITY_ORDERED, 0)
+    assert availability[quotas['in_carts'].pk] == (Quota.AVAILABILITY_RESERVED, 0)
+    assert availability[quotas['variation'].pk] == (Quota.AVAILABILITY_OK, 2)
+    assert len(queries.captured_queries) == 6
+
+
+def _put_on_sale(event):
+    with scope(organizer=event.organizer):
+        event.presale_start = now() - timedelta(days=1)
+        event.save()
+        item = event.items.create(name="Ticket", default_price=10)
+        quota = event.quotas.create(name="Tickets", size=100)
+        quota.items.add(item)
+    return item
+
+
+def _cool_down_quotas():
+    # pretix would otherwise use the availability it cached on the quotas instead of computing it
+    with scopes_disabled():
+        Quota.objects.update(cached_availability_time=None)
@@ -0,0 +1,66 @@
+import os
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils.timezone import now
+from pretix.base.models import Event, Organizer
+from pretix_landing_pages.models import (
+    LandingpageSettings, StartingpageSettings,
+)
+
+
+@pytest.fixture
+def env(locmem_cache, tmpdir):
+    organizer = Organizer.objects.create(name="Exported Organizer", slug="exported")
+    setting = LandingpageSettings.objects.create(organizer=organizer, active=True)
+    setting.index = SimpleUploadedFile(
+        'index.html', content=b"{% for e in upcoming_events %}{{ e.name }};{% endfor %}"
+    )
+    setting.save()
+    Event.objects.create(organizer=organizer, name="Concert", slug="concert", live=True,
+                         date_from=now() + timedelta(days=1))
+    inactive = Organizer.objects.create(name="Inactive Organizer", slug="inactive")
+    LandingpageSettings.objects.create(organizer=inactive, active=False)
+    return organizer, setting, str(tmpdir)
+
+
+@pytest.mark.django_db
+def test_active_landing_pages_are_exported(env):
+    starting_page, _ = StartingpageSettings.objects.get_or_create(pk=1)
+    starting_page.index = SimpleUploadedFile('index.html', content=b"<html><body>Welcome</body></html>")
+    starting_page.startingpage_active = True
+    starting_page.save()
+
+    call_command('export_landing_pages', env[2])
+    with open(os.path.join(env[2], 'exported', 'index.html')) as f:
+        assert f.read() == "Concert;"
+    with open(os.path.join(env[2], 'index.html')) as f:
+        assert f.read() == "<html><body>Welcome</body></html>"
+    assert not os.path.exists(os.path.join(env[2], 'inactive'))
+
+
+@pytest.mark.django_db
+def test_incremental_export_only_renders_changed_pages(env):
+    path = os.path.join(env[2], 'exported', 'index.html')
+    call_command('export_landing_pages', env[2])
+    os.utime(path, (0, 0))
+
+    call_command('export_landing_pages', env[2], incremental=True)
+    assert os.path.getmtime(path) == 0
+
+    Event.objects.create(organizer=env[0], name="Festival", slug="festival", live=True,
+                         date_from=now() + timedelta(days=2))
+    call_command('export_landing_pages', env[2], incremental=True)
+    with open(path) as f:
+        assert f.read() == "Concert;Festival;"
+
+
+@pytest.mark.django_db
+def test_deactivated_landing_page_is_removed(env):
+    call_command('export_landing_pages', env[2], incremental=True)
+    env[1].active = False
+    env[1].save()
+    call_command('export_landing_pages', env[2], incremental=True)
+    assert not os.path.exists(os.path.join(env[2], 'exported', 'index.html'))
@@ -1,12 +1,27 @@
+import gzip
 import os
+import re
+import time
+from io import BytesIO
 
 import pytest
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from pretix.base.models import Organizer, Team, User
+from PIL import Image
+from pretix.base.models import LogEntry, Organizer, Team, User
 from pretix.settings import MEDIA_ROOT
-from pretix_landing_pages.models import LandingpageFile, LandingpageSettings
+from pretix_landing_pages import signals, tasks
+from pretix_landing_pages.assets import collect_outdated_fingerprinted_files
+from pretix_landing_pages.models import (
+    PROCESSING_DONE, PROCESSING_FAILED, LandingpageFile, LandingpageSettings,
+)
+from pretix_landing_pages.templatetags.load_path import (
+    get_asset_manifest, get_srcset_manifest,
+)
 
-from ..helper_methods import __get_upload_file, __login_as_admin
+from ..helper_methods import (
+    __get_upload_file, __get_zip_file, __login_as_admin,
+)
 
 
 @pytest.fixture
@@ -89,6 +104,54 @@ def test_landingpage_files_are_deleted(env, client):
     assert LandingpageFile.objects.filter(organizer=env[0]).count() == 0
     client.post("/control/organizer/" + env[0].slug + "/landingpage/delete_all/")
     assert LandingpageFile.objects.filter(organizer=env[0]).count() == 0
+
+
+@pytest.mark.django_db
+def test_uploaded_files_are_logged_once(env, client):
+    files = [__get_upload_file('style%d.css' % i, b"a{}") for i in range(10)]
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': files})
+
+    assert LandingpageFile.objects.filter(organizer=env[0]).count() == 10
+    assert not LogEntry.objects.filter(action_type__startswith='pretix_landing_pages.landingpagefile').exists()
+    log_entry = LogEntry.objects.get(action_type='pretix_landing_pages.landingpagesettings.files_uploaded')
+    assert log_entry.parsed_data['files'] == sorted(f.name for f in files)
+
+
+@pytest.mark.django_db
+def test_all_files_are_deleted_in_bulk(env, client, django_assert_max_num_queries):
+    files = [__get_upload_file('style%d.css' % i, b"a{}") for i in range(20)]
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': files})
+    folder = os.path.join(env[2], 'templates/landing_pages', str(env[0].id))
+
+    with django_assert_max_num_queries(25):
+        client.post('/control/organizer/FB20/landingpage/delete_all/')
+    assert not LandingpageFile.objects.filter(organizer=env[0]).exists()
+    assert not os.path.exists(os.path.join(folder, 'style0.css'))
+    assert not os.path.exists(os.path.join(folder, 'style0.css.gz'))
+    assert get_asset_manifest(env[0].id) == {}
+    log_entry = LogEntry.objects.get(action_type='pretix_landing_pages.landingpagesettings.files_deleted')
+    assert log_entry.parsed_data['files'] == sorted(f.name for f in files)
+
+
+@pytest.mark.django_db
+def test_files_uploaded_again_before_deletion_are_kept(env, client, monkeypatch):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('style.css', b"a{}"),
+                                                                             __get_upload_file('old.css', b"b{}")]})
+    delayed = []
+    monkeypatch.setattr(tasks.delete_stored_files, 'apply_async', lambda args: delayed.append(args))
+    client.post('/control/organizer/FB20/landingpage/delete_all/')
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('style.css', b"c{}")]})
+
+    tasks.delete_stored_files(*delayed[0])
+    folder = os.path.join(env[2], 'templates/landing_pages', str(env[0].id))
+    with open(os.path.join(folder, 'style.css'), 'rb') as f:
+        assert f.read() == b"c{}"
+    assert os.path.isfile(os.path.join(folder, 'style.css.gz'))
+    assert not os.path.exists(os.path.join(folder, 'old.css'))
+    assert not os.path.exists(os.path.join(folder, 'old.css.gz'))
 # endregion
 
 
@@ -124,3 +187,302 @@ def test_index_not_in_media_dir(env, client):
     client.post('/control/organizer/FB20/landingpage/', data={'file_field': [file_a]})
     assert not os.path.exists(os.path.join(env[2] + "/templates/landing_pages", env[0].slug, 'index.html'))
 # endregion
+
+
+# region Fingerprinting
+@pytest.mark.django_db
+def test_uploaded_file_is_fingerprinted(env, client):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('style.css', b"a{}")]})
+
+    file_model = LandingpageFile.objects.get(organizer=env[0], filename='style.css')
+    assert file_model.content_hash
+    url = get_asset_manifest(env[0].id)['style.css']
+    assert re.match(r'^.*templates/landing_pages/%d/style\.%s\.css$' % (env[0].id, file_model.content_hash[:12]), url)
+    assert os.path.isfile(os.path.join(env[2], url.split('/media/')[1]))
+
+
+@pytest.mark.django_db
+def test_outdated_fingerprinted_files_are_collected(env, client):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('style.css', b"a{}")]})
+    old_url = get_asset_manifest(env[0].id)['style.css']
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('style.css', b"b{}")],
+                                                              'override_files': 'on'})
+    new_url = get_asset_manifest(env[0].id)['style.css']
+    assert old_url != new_url
+
+    old_path = os.path.join(env[2], old_url.split('/media/')[1])
+    new_path = os.path.join(env[2], new_url.split('/media/')[1])
+    collect_outdated_fingerprinted_files()
+    assert os.path.isfile(old_path)
+
+    eight_days_ago = time.time() - 8 * 24 * 3600
+    os.utime(old_path, (eight_days_ago, eight_days_ago))
+    os.utime(new_path, (eight_days_ago, eight_days_ago))
+    collect_outdated_fingerprinted_files()
+    assert not os.path.exists(old_path)
+    assert os.path.isfile(new_path)
+    assert os.path.isfile(os.path.join(env[2], 'templates/landing_pages/%d/style.css' % env[0].id))
+
+
+@pytest.mark.django_db
+def test_fingerprinted_files_are_collected_once_a_day(locmem_cache, monkeypatch):
+    collections = []
+    monkeypatch.setattr(signals, 'collect_outdated_fingerprinted_files', lambda: collections.append(True))
+    signals.collect_fingerprinted_files(None)
+    signals.collect_fingerprinted_files(None)
+    assert len(collections) == 1
+
+    cache.delete('pretix_landing_pages:fingerprinted_files_collected')
+    signals.collect_fingerprinted_files(None)
+    assert len(collections) == 2
+# endregion
+
+
+# region Compression
+@pytest.mark.django_db
+def test_compressible_files_are_precompressed(env, client):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('style.css', b"a{}"),
+                                                                             __get_upload_file('image.png', b"PNG")]})
+    folder = os.path.join(env[2], 'templates/landing_pages', str(env[0].id))
+    with gzip.open(os.path.join(folder, 'style.css.gz')) as f:
+        assert f.read() == b"a{}"
+    public_name = get_asset_manifest(env[0].id)['style.css'].split('/')[-1]
+    assert os.path.isfile(os.path.join(folder, public_name + '.gz'))
+    assert not os.path.exists(os.path.join(folder, 'image.png.gz'))
+
+    client.post('/control/organizer/FB20/landingpage/delete_files/style.css/')
+    assert not os.path.exists(os.path.join(folder, 'style.css'))
+    assert not os.path.exists(os.path.join(folder, 'style.css.gz'))
+    assert not os.path.exists(os.path.join(folder, 'style.css.br'))
+
+
+@pytest.mark.django_db
+def test_compressible_files_are_precompressed_with_brotli(env, client):
+    brotli = pytest.importorskip('brotli')
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('app.js', b"x=1")]})
+    path = os.path.join(env[2], 'templates/landing_pages', str(env[0].id), 'app.js.br')
+    with open(path, 'rb') as f:
+        assert brotli.decompress(f.read()) == b"x=1"
+
+
+@pytest.mark.django_db
+def test_stylesheets_and_scripts_are_minified(env, client):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={
+        'file_field': [__get_upload_file('style.css', b"/* comment */\na {\n  color: red;\n}\n"),
+                       __get_upload_file('app.js', b"// comment\nvar x = 1;\n"),
+                       __get_upload_file('page.html', b"<p>  text  </p>")],
+        'minify': True,
+    })
+    assert LandingpageFile.objects.get(organizer=env[0], filename='style.css').file.read() == b"a{color:red}"
+    assert LandingpageFile.objects.get(organizer=env[0], filename='app.js').file.read() == b"var x=1;"
+    assert LandingpageFile.objects.get(organizer=env[0], filename='page.html').file.read() == b"<p>  text  </p>"
+
+    client.post('/control/organizer/FB20/landingpage/', data={
+        'file_field': [__get_upload_file('other.css', b"a {  }")]
+    })
+    assert LandingpageFile.objects.get(organizer=env[0], filename='other.css').file.read() == b"a {  }"
+# endregion
+
+
+# region Bundle Upload
+@pytest.mark.django_db
+def test_bundle_files_are_imported(env, client, django_assert_max_num_queries):
+    files = {'index.html': b"<html><body>Bundle</body></html>", 'style.css': b"a{}"}
+    files.update({'image%d.png' % i: b"PNG" for i in range(20)})
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('keep.css', b"k{}")]})
+
+    with django_assert_max_num_queries(60):
+        client.post('/control/organizer/FB20/landingpage/', data={'bundle': __get_zip_file('site.zip', files)})
+
+    setting = LandingpageSettings.objects.get(organizer=env[0])
+    assert setting.index.read() == b"<html><body>Bundle</body></html>"
+    assert LandingpageFile.objects.filter(organizer=env[0]).count() == 22
+    style = LandingpageFile.objects.get(organizer=env[0], filename='style.css')
+    assert style.file.read() == b"a{}"
+    assert style.content_hash
+    assert get_asset_manifest(env[0].id)['image19.png']
+    log_entry = LogEntry.objects.filter(action_type='pretix_landing_pages.landingpagesettings.files_uploaded').first()
+    assert len(log_entry.parsed_data['files']) == 22
+
+
+@pytest.mark.django_db
+def test_bundle_respects_override(env, client):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'bundle': __get_zip_file('site.zip', {'a.css': b"1"})})
+    client.post('/control/organizer/FB20/landingpage/', data={'bundle': __get_zip_file('site.zip', {'a.css': b"2"})})
+    assert LandingpageFile.objects.get(organizer=env[0], filename='a.css').file.read() == b"1"
+
+    client.post('/control/organizer/FB20/landingpage/', data={'bundle': __get_zip_file('site.zip', {'a.css': b"3"}),
+                                                              'override_files': 'on'})
+    assert LandingpageFile.objects.get(organizer=env[0], filename='a.css').file.read() == b"3"
+
+
+@pytest.mark.django_db
+def test_bundle_with_invalid_names_is_rejected(env, client):
+    __login_as_admin(env, client, False)
+    r = client.post('/control/organizer/FB20/landingpage/',
+                    data={'bundle': __get_zip_file('site.zip', {'ok.css': b"1", 'css/nested.css': b"2"})})
+    assert 'css/nested.css' in r.content.decode()
+    assert not LandingpageFile.objects.filter(organizer=env[0]).exists()
+
+    r = client.post('/control/organizer/FB20/landingpage/',
+                    data={'bundle': SimpleUploadedFile('site.zip', content=b"no zip")})
+    assert not LandingpageFile.objects.filter(organizer=env[0]).exists()
+# endregion
+
+
+# region Processing
+@pytest.mark.django_db
+def test_uploaded_files_are_processed(env, client):
+    __login_as_admin(env, client, False)
+    r = client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('style.css', b"a{}")]})
+    assert LandingpageFile.objects.get(organizer=env[0], filename='style.css').processing_status == PROCESSING_DONE
+    assert 'Ready' in r.content.decode()
+
+
+@pytest.mark.django_db
+def test_failed_processing_is_shown(env, client, monkeypatch):
+    def fail(file_model):
+        raise OSError()
+    monkeypatch.setattr(tasks, 'prepare_uploaded_file', fail)
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('style.css', b"a{}")]})
+
+    file_model = LandingpageFile.objects.get(organizer=env[0], filename='style.css')
+    assert file_model.processing_status == PROCESSING_FAILED
+    assert not file_model.content_hash
+    assert get_asset_manifest(env[0].id)['style.css'].endswith('/style.css')
+    assert 'Processing failed' in client.get('/control/organizer/FB20/landingpage/').content.decode()
+
+
+@pytest.mark.django_db
+def test_failed_processing_of_new_upload_serves_new_file(env, client, monkeypatch):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('hero.png', __get_image(1000, 500))]})
+    file_model = LandingpageFile.objects.get(organizer=env[0], filename='hero.png')
+    assert file_model.content_hash and file_model.variant_widths
+
+    def fail(file_model):
+        raise OSError()
+    monkeypatch.setattr(tasks, 'prepare_uploaded_file', fail)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('hero.png', __get_image(800, 400))],
+                                                              'override_files': 'on'})
+
+    file_model.refresh_from_db()
+    assert file_model.processing_status == PROCESSING_FAILED
+    assert not file_model.content_hash
+    assert not file_model.variant_widths
+    assert get_asset_manifest(env[0].id)['hero.png'].endswith('/hero.png')
+    assert get_srcset_manifest(env[0].id) == {}
+# endregion
+
+
+# region Image Variants
+def __get_image(width, height, image_format='PNG'):
+    buffer = BytesIO()
+    Image.new('RGBA' if image_format == 'PNG' else 'RGB', (width, height), (255, 0, 0, 128)).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+@pytest.mark.django_db
+def test_image_variants_are_created(env, client):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('hero.png', __get_image(1000, 500))]})
+
+    file_model = LandingpageFile.objects.get(organizer=env[0], filename='hero.png')
+    assert file_model.variant_widths == '480,960,1000'
+    folder = os.path.join(env[2], 'templates/landing_pages', str(env[0].id))
+    with Image.open(os.path.join(folder, 'hero-480w.%s.webp' % file_model.content_hash[:12])) as image:
+        assert image.format == 'WEBP'
+        assert image.size == (480, 240)
+    with Image.open(os.path.join(folder, 'hero-1000w.%s.jpg' % file_model.content_hash[:12])) as image:
+        assert image.format == 'JPEG'
+        assert image.size == (1000, 500)
+
+    srcsets = get_srcset_manifest(env[0].id)['hero.png']
+    assert re.match(r'^/media/\S+/hero-480w\.[0-9a-f]{12}\.webp 480w, \S+ 960w, \S+/hero-1000w\.[0-9a-f]{12}\.webp 1000w$', srcsets['webp'])
+    assert srcsets['jpeg'].count('.jpg ') == 3
+
+
+@pytest.mark.django_db
+def test_image_variant_widths_are_configurable(env, client, settings):
+    settings.CONFIG_FILE.read_dict({'pretix_landing_pages': {'image_widths': '100, 50'}})
+    try:
+        __login_as_admin(env, client, False)
+        client.post('/control/organizer/FB20/landingpage/',
+                    data={'file_field': [__get_upload_file('photo.jpg', __get_image(300, 300, 'JPEG'))]})
+    finally:
+        settings.CONFIG_FILE.remove_section('pretix_landing_pages')
+    assert LandingpageFile.objects.get(organizer=env[0], filename='photo.jpg').variant_widths == '50,100'
+
+
+@pytest.mark.django_db
+def test_unreadable_images_have_no_variants(env, client):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('broken.png', b"PNG")]})
+
+    file_model = LandingpageFile.objects.get(organizer=env[0], filename='broken.png')
+    assert file_model.processing_status == PROCESSING_DONE
+    assert file_model.variant_widths == ''
+    assert 'broken.png' not in get_srcset_manifest(env[0].id)
+
+
+@pytest.mark.django_db
+def test_current_image_variants_are_not_collected(env, client):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('hero.png', __get_image(600, 300))]})
+    file_model = LandingpageFile.objects.get(organizer=env[0], filename='hero.png')
+    path = os.path.join(env[2], 'templates/landing_pages', str(env[0].id), 'hero-480w.%s.webp' % file_model.content_hash[:12])
+    eight_days_ago = time.time() - 8 * 24 * 3600
+    os.utime(path, (eight_days_ago, eight_days_ago))
+    collect_outdated_fingerprinted_files()
+    assert os.path.isfile(path)
+# endregion
+
+
+# region Template Validation
+@pytest.mark.django_db
+def test_invalid_index_is_rejected(env, client):
+    __login_as_admin(env, client, False)
+    r = client.post('/control/organizer/FB20/landingpage/', data={
+        'file_field': [__get_upload_file('index.html', b"<html>\n{% if %}\n</html>"), __get_upload_file('style.css', b"a{}")]
+    })
+    assert 'index.html is no valid template, line 2' in r.content.decode()
+    assert not LandingpageSettings.objects.get(organizer=env[0]).index
+    assert not LandingpageFile.objects.filter(organizer=env[0]).exists()
+
+    r = client.post('/control/organizer/FB20/landingpage/', data={
+        'bundle': __get_zip_file('site.zip', {'index.html': b"{% load unknown_library %}"})
+    })
+    assert 'index.html is no valid template, line 1' in r.content.decode()
+    assert 'unknown_library' in r.content.decode()
+    assert not LandingpageSettings.objects.get(organizer=env[0]).index
+
+
+@pytest.mark.django_db
+def test_costly_patterns_in_index_are_warned_about(env, client):
+    index = b"""{% load load_calendar_data %}
+{% include "pretixplugins/pretix_landing_pages/calendar.html" %}
+{% include "pretixplugins/pretix_landing_pages/calendar.html" %}
+{{ previous_events.count }}
+{% for a in upcoming_events %}{% for b in previous_events %}{{ b.name }}{% endfor %}{% endfor %}"""
+    __login_as_admin(env, client, False)
+    r = client.post('/control/organizer/FB20/landingpage/', data={'file_field': [__get_upload_file('index.html', index)]})
+    content = r.content.decode()
+    assert LandingpageSettings.objects.get(organizer=env[0]).index
+    assert 'The calendar is loaded more than once' in content
+    assert 'Line 4: previous_events.count counts all events' in content
+    assert 'Line 5: previous_events is iterated inside another loop' in content
+
+    r = client.post('/control/organizer/FB20/landingpage/', data={
+        'file_field': [__get_upload_file('index.html', b"{% for e in upcoming_events %}{{ e.name }}{% endfor %}")],
+        'override_files': True,
+    })
+    assert 'alert-warning' not in r.content.decode()
+# endregion
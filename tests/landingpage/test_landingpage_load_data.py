@@ -0,0 +1,54 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils.timezone import now
+from django_scopes import scopes_disabled
+from pretix.base.models import Event, Organizer, SubEvent
+from pretix_landing_pages.models import (
+    LandingpageFile, LandingpageSettings, StartingpageFile,
+)
+
+
+@pytest.mark.django_db
+def test_load_data_is_generated(client):
+    call_command('generate_load_data', organizers=3, events=10, series=2, subevents=5, assets=4, past_share=0.3,
+                 startingpage=True)
+    with scopes_disabled():
+        organizers = Organizer.objects.filter(slug__startswith='load-')
+        assert sorted(o.slug for o in organizers) == ['load-0', 'load-1', 'load-2']
+        assert LandingpageSettings.objects.filter(organizer__in=organizers, active=True).count() == 3
+
+        events = Event.objects.filter(organizer__slug='load-1', has_subevents=False)
+        assert events.count() == 10
+        assert events.filter(date_from__lt=now()).count() == 3
+        assert Event.objects.filter(has_subevents=True).count() == 6
+        assert SubEvent.objects.filter(event__organizer__slug='load-2').count() == 10
+        assert sorted(LandingpageFile.objects.filter(organizer__slug='load-0').values_list('filename', flat=True)) == [
+            'asset0.css', 'asset1.js', 'asset2.png', 'asset3.jpg'
+        ]
+    assert StartingpageFile.objects.count() == 4
+
+    r = client.get('/load-1/')
+    assert r.status_code == 200
+    assert b'Event 9' in r.content
+    assert client.get('/').status_code == 200
+
+
+@pytest.mark.django_db
+def test_same_seed_generates_same_dates():
+    call_command('generate_load_data', organizers=1, events=5, series=0, prefix='first', seed=42)
+    call_command('generate_load_data', organizers=1, events=5, series=0, prefix='second', seed=42)
+    with scopes_disabled():
+        first, second = (
+            list(Event.objects.filter(organizer__slug=slug).order_by('slug').values_list('date_from', flat=True))
+            for slug in ('first-0', 'second-0')
+        )
+    # the dates are generated relative to the current time
+    assert [d - first[0] for d in first] == [d - second[0] for d in second]
+
+
+@pytest.mark.django_db
+def test_existing_organizers_are_not_touched():
+    Organizer.objects.create(name="Existing", slug="load-0")
+    with pytest.raises(CommandError):
+        call_command('generate_load_data', organizers=1)
+    assert not LandingpageSettings.objects.exists()
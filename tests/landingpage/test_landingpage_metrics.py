@@ -0,0 +1,106 @@
+from collections import Counter
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from pretix.base.metrics import Metric
+from pretix.base.models import Organizer, Team, User
+from pretix_landing_pages.models import LandingpageSettings
+
+from ..helper_methods import __get_upload_file, __login_as_admin
+
+
+@pytest.fixture
+def env(locmem_cache):
+    admin = User.objects.create_superuser(email="admin@localhost", password="admin")
+    organizer = Organizer.objects.create(name="Measured Organizer", slug="measured")
+    setting = LandingpageSettings.objects.create(organizer=organizer, active=True, cache_ttl=60)
+    setting.index = SimpleUploadedFile('index.html', content=b"""{% load load_path %}{% load_path "style.css" %}""")
+    setting.save()
+    t = Team.objects.create(organizer=organizer, can_change_organizer_settings=True)
+    t.members.add(admin)
+    return organizer, admin, setting
+
+
+@pytest.fixture
+def metrics(settings, monkeypatch):
+    # the metrics are stored in redis, which is not available in the tests
+    settings.METRICS_ENABLED = True
+    values = Counter()
+
+    def inc_in_redis(self, key, amount, pipeline=None):
+        values[key] += amount
+    monkeypatch.setattr(Metric, '_inc_in_redis', inc_in_redis)
+    return values
+
+
+@pytest.fixture
+def config(settings):
+    def set_config(**options):
+        settings.CONFIG_FILE.read_dict({'pretix_landing_pages': options})
+    yield set_config
+    settings.CONFIG_FILE.remove_section('pretix_landing_pages')
+
+
+@pytest.mark.django_db
+def test_page_durations_and_cache_lookups_are_recorded(env, client, metrics):
+    client.get('/measured/')
+    client.get('/measured/')
+    assert metrics['pretix_landing_pages_page_duration_seconds_count{page="landingpage",result="rendered",organizer=""}'] == 1
+    assert metrics['pretix_landing_pages_page_duration_seconds_count{page="landingpage",result="cached",organizer=""}'] == 1
+    assert metrics['pretix_landing_pages_page_duration_seconds_bucket{page="landingpage",result="cached",organizer="",le="+Inf"}'] == 1
+    assert metrics['pretix_landing_pages_cache_lookups_total{cache="page",result="miss"}'] == 1
+    assert metrics['pretix_landing_pages_cache_lookups_total{cache="page",result="hit"}'] == 1
+    assert metrics['pretix_landing_pages_cache_lookups_total{cache="asset_manifest",result="miss"}'] == 1
+
+
+@pytest.mark.django_db
+def test_template_and_calendar_lookups_are_recorded(env, client, metrics):
+    env[2].index.delete()
+    env[2].index = SimpleUploadedFile('index.html', content=b'{% include "pretixplugins/pretix_landing_pages/calendar.html" %}')
+    env[2].template_version += 1
+    env[2].cache_ttl = 0
+    env[2].save()
+    client.get('/measured/')
+    client.get('/measured/')
+    for cache in ('template', 'calendar'):
+        assert metrics['pretix_landing_pages_cache_lookups_total{cache="%s",result="miss"}' % cache] == 1
+        assert metrics['pretix_landing_pages_cache_lookups_total{cache="%s",result="hit"}' % cache] == 1
+
+
+@pytest.mark.django_db
+def test_fallbacks_are_counted(env, client, metrics, config):
+    config(render_max_queries='1')
+    client.get('/measured/')
+    env[2].active = False
+    env[2].save()
+    client.get('/measured/')
+    assert metrics['pretix_landing_pages_fallbacks_total{page="landingpage",reason="render_budget",target="default",organizer=""}'] == 1
+    assert metrics['pretix_landing_pages_fallbacks_total{page="landingpage",reason="inactive",target="default",organizer=""}'] == 1
+    assert metrics['pretix_landing_pages_page_duration_seconds_count{page="landingpage",result="default",organizer=""}'] == 2
+
+
+@pytest.mark.django_db
+def test_organizers_are_only_labelled_if_configured(env, client, metrics, config):
+    config(metrics_per_organizer='on')
+    client.get('/measured/')
+    assert metrics['pretix_landing_pages_page_duration_seconds_count{page="landingpage",result="rendered",organizer="measured"}'] == 1
+
+
+@pytest.mark.django_db
+def test_file_operation_durations_are_recorded(env, client, metrics):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/measured/landingpage/', data={'cache_ttl': 60})
+    assert not any('file_operation' in key for key in metrics)
+
+    client.post('/control/organizer/measured/landingpage/', data={'cache_ttl': 60, 'file_field': [__get_upload_file('style.css', b"a{}")]})
+    client.post('/control/organizer/measured/landingpage/delete_files/style.css/')
+    client.post('/control/organizer/measured/landingpage/delete_all/')
+    for operation in ('upload', 'delete', 'delete_all'):
+        assert metrics['pretix_landing_pages_file_operation_duration_seconds_count{page="landingpage",operation="%s"}' % operation] == 1
+
+
+@pytest.mark.django_db
+def test_nothing_is_recorded_if_metrics_are_disabled(env, client, metrics, settings):
+    settings.METRICS_ENABLED = False
+    client.get('/measured/')
+    assert not metrics
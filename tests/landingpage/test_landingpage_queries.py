@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils.timezone import now
+from pretix.base.models import Event, Organizer, Team, User
+from pretix_landing_pages.cache import invalidate_calendar_months
+from pretix_landing_pages.models import LandingpageFile, LandingpageSettings
+
+from ..helper_methods import (
+    __count_queries, __get_upload_file, __login_as_admin,
+)
+
+# Upper limits of the queries of the views of the landing page. They must not depend on the number of events or files,
+# which is checked by comparing few against many of them.
+ORGANIZER_INDEX_MAX_QUERIES = 16
+SETTINGS_GET_MAX_QUERIES = 11
+SETTINGS_UPLOAD_MAX_QUERIES = 24
+DELETE_FILE_MAX_QUERIES = 14
+DELETE_ALL_MAX_QUERIES = 16
+
+
+@pytest.fixture
+def env(locmem_cache):
+    admin = User.objects.create_superuser(email="admin@localhost", password="admin")
+    organizer = Organizer.objects.create(name="Counted Organizer", slug="counted")
+    setting = LandingpageSettings.objects.create(organizer=organizer, active=True, cache_ttl=0)
+    t = Team.objects.create(organizer=organizer, can_change_organizer_settings=True)
+    t.members.add(admin)
+    return organizer, admin, setting
+
+
+def _add_events(organizer, start, count):
+    for i in range(start, start + count):
+        Event.objects.create(organizer=organizer, name="Upcoming %d" % i, slug="up%d" % i, live=True,
+                             date_from=now() + timedelta(hours=i + 1))
+        Event.objects.create(organizer=organizer, name="Previous %d" % i, slug="prev%d" % i, live=True,
+                             date_from=now() - timedelta(hours=i + 1))
+
+
+def _add_files(organizer, start, count):
+    for i in range(start, start + count):
+        LandingpageFile.objects.create(organizer=organizer, filename='file%d.css' % i,
+                                       file=__get_upload_file('file%d.css' % i, b"a{}"))
+
+
+def _set_index(setting, load_path_calls):
+    load_paths = ''.join('{%% load_path "file%d.css" %%}' % i for i in range(load_path_calls))
+    setting.index = SimpleUploadedFile('index.html', content=("""{% load load_path %}
+{% include "pretixplugins/pretix_landing_pages/event_list.html" with events=upcoming_events %}
+{% include "pretixplugins/pretix_landing_pages/event_list.html" with events=previous_events %}
+{% include "pretixplugins/pretix_landing_pages/calendar.html" %}
+""" + load_paths).encode())
+    setting.template_version += 1
+    setting.save()
+
+
+def _count_page_queries(client, organizer):
+    # the first request fills the caches pretix keeps for every event, e.g. of its domain,
+    # the calendar of the shown month is dropped afterwards, so it is computed by the measured request again
+    client.get('/counted/')
+    next_date = now() + timedelta(hours=1)
+    invalidate_calendar_months(organizer.id, [(next_date.year, next_date.month)])
+    return __count_queries(client.get, '/counted/')
+
+
+@pytest.mark.django_db
+def test_organizer_index_queries(env, client):
+    _add_events(env[0], 0, 2)
+    _add_files(env[0], 0, 2)
+    _set_index(env[2], 2)
+    few = _count_page_queries(client, env[0])
+
+    _add_events(env[0], 2, 30)
+    _add_files(env[0], 2, 20)
+    _set_index(env[2], 22)
+    many = _count_page_queries(client, env[0])
+    assert many == few
+    assert many <= ORGANIZER_INDEX_MAX_QUERIES
+
+
+@pytest.mark.django_db
+def test_settings_page_queries(env, client):
+    __login_as_admin(env, client, False)
+    _add_files(env[0], 0, 1)
+    # the first request of the session loads data that is cached for the session afterwards
+    client.get('/control/organizer/counted/landingpage/')
+    few = __count_queries(client.get, '/control/organizer/counted/landingpage/')
+
+    _add_files(env[0], 1, 50)
+    many = __count_queries(client.get, '/control/organizer/counted/landingpage/')
+    assert many == few
+    assert many <= SETTINGS_GET_MAX_QUERIES
+
+
+@pytest.mark.django_db
+def test_upload_queries(env, client):
+    __login_as_admin(env, client, False)
+    client.post('/control/organizer/counted/landingpage/', data={'file_field': [__get_upload_file('first.css', b"a{}")]})
+    few = __count_queries(client.post, '/control/organizer/counted/landingpage/', data={
+        'active': 'on', 'cache_ttl': 0, 'file_field': [__get_upload_file('a%d.css' % i, b"a{}") for i in range(2)]
+    })
+    many = __count_queries(client.post, '/control/organizer/counted/landingpage/', data={
+        'active': 'on', 'cache_ttl': 0, 'file_field': [__get_upload_file('b%d.css' % i, b"a{}") for i in range(30)]
+    })
+    assert LandingpageFile.objects.filter(organizer=env[0]).count() == 33
+    assert many == few
+    assert many <= SETTINGS_UPLOAD_MAX_QUERIES
+
+
+@pytest.mark.django_db
+def test_delete_queries(env, client):
+    __login_as_admin(env, client, False)
+    _add_files(env[0], 0, 3)
+    client.post('/control/organizer/counted/landingpage/delete_files/file0.css/')
+    few = __count_queries(client.post, '/control/organizer/counted/landingpage/delete_files/file1.css/')
+
+    _add_files(env[0], 3, 30)
+    many = __count_queries(client.post, '/control/organizer/counted/landingpage/delete_files/file2.css/')
+    assert many == few
+    assert many <= DELETE_FILE_MAX_QUERIES
+
+    assert LandingpageFile.objects.filter(organizer=env[0]).count() == 30
+    many = __count_queries(client.post, '/control/organizer/counted/landingpage/delete_all/')
+    _add_files(env[0], 0, 2)
+    few = __count_queries(client.post, '/control/organizer/counted/landingpage/delete_all/')
+    assert not LandingpageFile.objects.filter(organizer=env[0]).exists()
+    assert many == few
+    assert many <= DELETE_ALL_MAX_QUERIES
@@ -0,0 +1,125 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import RequestFactory
+from pretix.base.models import Organizer
+from pretix_landing_pages.cache import (
+    LAST_GOOD_RESPONSE_TTL, get_last_good_response,
+)
+from pretix_landing_pages.models import (
+    LandingpageSettings, StartingpageSettings,
+)
+
+
+@pytest.fixture
+def env(locmem_cache):
+    organizer = Organizer.objects.create(name="Budget Organizer", slug="budget")
+    setting = LandingpageSettings.objects.create(organizer=organizer, active=True, cache_ttl=0)
+    setting.index = SimpleUploadedFile(
+        'index.html', content=b"{% for e in upcoming_events %}{% endfor %}{% for e in previous_events %}{% endfor %}OK"
+    )
+    setting.save()
+    return organizer, setting
+
+
+@pytest.fixture
+def budget(settings):
+    def set_budget(**options):
+        settings.CONFIG_FILE.read_dict({'pretix_landing_pages': options})
+    yield set_budget
+    settings.CONFIG_FILE.remove_section('pretix_landing_pages')
+
+
+@pytest.mark.django_db
+def test_page_within_budget_is_rendered(env, client, budget):
+    budget(render_max_queries='100', render_max_bytes='100')
+    r = client.get('/budget/')
+    assert r.templates[0].name == 'landing_pages/%d/index.html' % env[0].id
+    assert r.content == b"OK"
+
+
+@pytest.mark.django_db
+def test_too_many_queries_fall_back_to_default_page(env, client, budget):
+    budget(render_max_queries='1')
+    r = client.get('/budget/')
+    assert r.status_code == 200
+    assert b"OK" not in r.content
+    assert 'pretixpresale/organizers/index.html' in [t.name for t in r.templates]
+
+
+@pytest.mark.django_db
+def test_too_large_output_falls_back_to_last_good_page(env, client, budget, caplog):
+    assert client.get('/budget/').content == b"OK"
+
+    budget(render_max_bytes='1')
+    r = client.get('/budget/')
+    assert r.status_code == 200
+    assert r.content == b"OK"
+    assert 'the output is larger than 1 bytes' in caplog.text
+
+
+@pytest.mark.django_db
+def test_too_slow_starting_page_falls_back_to_default_page(client, budget):
+    setting = StartingpageSettings.objects.create(startingpage_active=True)
+    setting.index = SimpleUploadedFile('index.html', content=b"<html><body>Welcome</body></html>")
+    setting.save()
+
+    budget(render_max_seconds='0.000000001')
+    r = client.get('/')
+    assert b"Welcome" not in r.content
+    assert 'pretixpresale/index.html' in [t.name for t in r.templates]
+
+
+@pytest.mark.django_db
+def test_loops_without_queries_are_stopped_while_rendering(env, client, budget):
+    env[1].index.delete()
+    # renders ten million nodes without querying anything, which takes far longer than the test allows
+    env[1].index = SimpleUploadedFile('index.html', content=(
+        b'{% for a in "x"|rjust:"10000" %}{% for b in "y"|rjust:"1000" %}.{% endfor %}{% endfor %}'
+    ))
+    env[1].template_version += 1
+    env[1].save()
+
+    budget(render_max_seconds='0.2', render_max_queries='0')
+    started = time.monotonic()
+    r = client.get('/budget/')
+    assert time.monotonic() - started < 5
+    assert 'pretixpresale/organizers/index.html' in [t.name for t in r.templates]
+    # other templates are not limited once the uploaded one was aborted
+    time.sleep(0.2)
+    assert Template('{% for a in "xy" %}{{ a }}{% endfor %}').render(Context()) == 'xy'
+
+
+@pytest.mark.django_db
+def test_only_pages_without_parameters_are_kept(env, client, budget):
+    client.get('/budget/?year=2030&month=1')
+    client.get('/budget/?upcoming_page=7')
+    assert get_last_good_response(RequestFactory().get('/budget/'), env[0].id) is None
+
+    budget(render_max_bytes='1')
+    r = client.get('/budget/?year=2030&month=1')
+    assert 'pretixpresale/organizers/index.html' in [t.name for t in r.templates]
+
+
+@pytest.mark.django_db
+def test_last_good_page_is_only_written_if_changed(env, client, monkeypatch):
+    writes = []
+    set_many = cache.set_many
+
+    def record_set_many(data, timeout):
+        writes.append(timeout)
+        set_many(data, timeout)
+    monkeypatch.setattr(cache, 'set_many', record_set_many)
+
+    client.get('/budget/')
+    client.get('/budget/')
+    assert writes == [LAST_GOOD_RESPONSE_TTL]
+
+    env[1].index = SimpleUploadedFile('index.html', content=b"Changed")
+    env[1].template_version += 1
+    env[1].save()
+    assert client.get('/budget/').content == b"Changed"
+    assert len(writes) == 2
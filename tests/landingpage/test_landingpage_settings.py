@@ -124,6 +124,27 @@ def test_change_active_status_by_admin(env, client):
 # endregion
 
 
+# region Template Version
+@pytest.mark.django_db
+def test_outdated_template_is_reloaded(env, client):
+    env[3].active = True
+    env[3].index = SimpleUploadedFile('index.html', content=b"<html><body>First version</body></html>")
+    env[3].save()
+    r = client.get("/FB9000/")
+    assert b"First version" in r.content
+
+    # another worker replaces the file without touching the template cache of this worker
+    pathlib.PosixPath(os.path.join(template_base_dir, str(env[0].id), 'index.html')) \
+        .write_bytes(b"<html><body>Second version</body></html>")
+    r = client.get("/FB9000/")
+    assert b"First version" in r.content
+
+    LandingpageSettings.objects.filter(pk=env[0]).update(template_version=env[3].template_version + 1)
+    r = client.get("/FB9000/")
+    assert b"Second version" in r.content
+# endregion
+
+
 # region Helper
 def __write_text_to_landingpage_of_organizer(text, organizer_id):
     organizer_template_path = os.path.join(template_base_dir, str(organizer_id))
@@ -0,0 +1,91 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache.backends import locmem
+from django.core.files.uploadedfile import SimpleUploadedFile
+from pretix.base.models import Organizer, Team, User
+from pretix.base.settings import GlobalSettingsObject
+from pretix_landing_pages.cache import (
+    LANDINGPAGE_STATE_TTL, set_cached_landingpage_state,
+)
+from pretix_landing_pages.models import LandingpageSettings
+from pretix_landing_pages.views import get_landingpage_state
+
+from ..helper_methods import __login_as_admin
+
+
+@pytest.fixture
+def env(locmem_cache):
+    admin = User.objects.create_superuser(email="admin@localhost", password="admin")
+    organizer = Organizer.objects.create(name="Stateful Organizer", slug="state")
+    setting = LandingpageSettings.objects.create(organizer=organizer, active=False)
+    t = Team.objects.create(organizer=organizer, can_change_organizer_settings=True)
+    t.members.add(admin)
+    return organizer, admin, setting
+
+
+@pytest.mark.django_db
+def test_state_is_cached(env, django_assert_num_queries):
+    state = get_landingpage_state(env[0])
+    assert state['available']
+    assert not state['active']
+    assert state['index'] == ''
+
+    with django_assert_num_queries(0):
+        assert get_landingpage_state(env[0]) == state
+
+
+@pytest.mark.django_db
+def test_state_without_settings_does_not_write(env):
+    organizer = Organizer.objects.create(name="Without Settings", slug="nosettings")
+    get_landingpage_state(organizer)
+    assert not LandingpageSettings.objects.filter(organizer=organizer).exists()
+
+
+@pytest.mark.django_db
+def test_state_rebuilt_on_settings_change(env):
+    get_landingpage_state(env[0])
+    env[2].active = True
+    env[2].save()
+    assert get_landingpage_state(env[0])['active']
+
+
+@pytest.mark.django_db
+def test_state_rebuilt_on_global_settings_change(env):
+    assert get_landingpage_state(env[0])['available']
+    gs = GlobalSettingsObject().settings
+    gs.enable_landingpage_for_all_organizers = False
+    assert not get_landingpage_state(env[0])['available']
+
+    gs.enable_landingpage_individually = [str(env[0].id)]
+    assert get_landingpage_state(env[0])['available']
+
+
+@pytest.mark.django_db
+def test_state_written_after_change_expires(env, monkeypatch):
+    outdated = get_landingpage_state(env[0])
+    env[2].active = True
+    env[2].save()
+    # a request that built the state before the change writes it after the invalidation
+    set_cached_landingpage_state(env[0].id, outdated)
+    assert not get_landingpage_state(env[0])['active']
+
+    expired = time.time() + LANDINGPAGE_STATE_TTL + 1
+    monkeypatch.setattr(locmem, 'time', SimpleNamespace(time=lambda: expired))
+    assert get_landingpage_state(env[0])['active']
+
+
+@pytest.mark.django_db
+def test_template_version_increases_on_upload(env, client):
+    version = get_landingpage_state(env[0])['template_version']
+    __login_as_admin(env, client, False)
+    index = SimpleUploadedFile('index.html', content=b"<html><body>Index</body></html>")
+    client.post('/control/organizer/state/landingpage/', data={'file_field': [index]})
+
+    state = get_landingpage_state(env[0])
+    assert state['template_version'] == version + 1
+    assert state['index'] == 'templates/landing_pages/%d/index.html' % env[0].id
+
+    client.post('/control/organizer/state/landingpage/delete_files/index.html/')
+    assert get_landingpage_state(env[0])['template_version'] == version + 2
@@ -0,0 +1,73 @@
+import re
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from pretix.base.models import Organizer, User
+from pretix_landing_pages.models import (
+    LandingpageSettings, StartingpageSettings,
+)
+from pretix_landing_pages.timing import landingpage_rendered
+
+
+@pytest.fixture
+def env():
+    organizer = Organizer.objects.create(name="Timed Organizer", slug="timed")
+    setting = LandingpageSettings.objects.create(organizer=organizer, active=True)
+    setting.index = SimpleUploadedFile('index.html', content=b"""{% load load_path %}
+{% for e in upcoming_events %}{{ e.name }}{% endfor %}
+{% include "pretixplugins/pretix_landing_pages/calendar.html" %}
+{% load_path "style.css" %}""")
+    setting.save()
+    staff = User.objects.create_superuser(email="admin@localhost", password="admin")
+    User.objects.create_user(email="casual@user.com", password="casual")
+    return organizer, staff
+
+
+@pytest.fixture
+def received():
+    timings = []
+
+    def receiver(sender, request, organizer, **kwargs):
+        timings.append((organizer, kwargs['timings']))
+    landingpage_rendered.connect(receiver, dispatch_uid='test_receiver')
+    yield timings
+    landingpage_rendered.disconnect(dispatch_uid='test_receiver')
+
+
+@pytest.mark.django_db
+def test_server_timing_is_shown_to_staff_members(env, client):
+    client.login(email="admin@localhost", password="admin")
+    r = client.get('/timed/')
+    phases = dict(re.findall(r'(\w+);dur=[0-9.]+;desc="(\d+) queries"', r['Server-Timing']))
+    assert set(phases) == {'state', 'render', 'events', 'calendar', 'assets'}
+    assert int(phases['render']) >= int(phases['events']) > 0
+
+
+@pytest.mark.django_db
+def test_server_timing_is_hidden_from_other_users(env, client):
+    assert 'Server-Timing' not in client.get('/timed/')
+    client.login(email="casual@user.com", password="casual")
+    assert 'Server-Timing' not in client.get('/timed/')
+
+
+@pytest.mark.django_db
+def test_server_timing_can_be_enabled_for_everyone(env, client, settings):
+    settings.CONFIG_FILE.read_dict({'pretix_landing_pages': {'server_timing': 'on'}})
+    try:
+        assert 'render;dur=' in client.get('/timed/')['Server-Timing']
+        StartingpageSettings.objects.create(startingpage_active=True, index=SimpleUploadedFile('index.html', b"Hi"))
+        assert 'render;dur=' in client.get('/')['Server-Timing']
+    finally:
+        settings.CONFIG_FILE.remove_section('pretix_landing_pages')
+
+
+@pytest.mark.django_db
+def test_timings_are_sent_to_receivers(env, client, received):
+    r = client.get('/timed/')
+    assert 'Server-Timing' not in r
+    organizer, timings = received[0]
+    assert organizer == env[0]
+    assert list(timings)[:2] == ['state', 'render']
+    duration, queries = timings['events']
+    assert duration > 0
+    assert queries == 1
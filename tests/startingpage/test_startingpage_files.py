@@ -7,7 +7,9 @@ from pretix.settings import MEDIA_ROOT
 from pretix_landing_pages.models import StartingpageFile, StartingpageSettings
 from pretix_landing_pages.views import starting_page_base_dir
 
-from ..helper_methods import __get_upload_file, __login_as_admin
+from ..helper_methods import (
+    __get_upload_file, __get_zip_file, __login_as_admin,
+)
 
 
 @pytest.fixture
@@ -31,9 +33,9 @@ def test_uploaded_startingpage_is_saved(env, client):
     __login_as_admin(env, client, True)
     client.post('/control/startingpage_settings/', data={'file_field': [file_a], 'redirect_link': '', 'apply': 'Apply'})
     assert LogEntry.objects \
-        .filter(action_type='pretix_landing_pages.startingpagesettings.index_updated') \
+        .filter(action_type='pretix_landing_pages.startingpagesettings.files_uploaded') \
         .filter(user_id=env[1].id) \
-        .filter(data="""{"index.html": "updated"}""") \
+        .filter(data="""{"files": ["index.html"]}""") \
         .first() is not None
     file = StartingpageSettings.objects.get().index
     assert file.readlines()[0] == b"<html><body>Das ist ein Test.html</body></html>"
@@ -173,3 +175,43 @@ def test_index_not_in_media_dir(env, client):
     client.post('/control/startingpage_settings/', data={'file_field': [file_a], 'redirect_link': '', 'apply': 'Apply'})
     assert not os.path.exists(os.path.join(env[2], '/templates/starting_pages', 'index.html'))
 # endregion
+
+
+# region Bulk Deletion
+@pytest.mark.django_db
+def test_all_startingpage_files_are_deleted_in_bulk(env, client):
+    __login_as_admin(env, client, True)
+    files = [__get_upload_file('style%d.css' % i, b"a{}") for i in range(5)]
+    client.post('/control/startingpage_settings/', data={'file_field': files, 'redirect_link': '', 'apply': 'Apply'})
+    path = StartingpageFile.objects.get(filename='style0.css').file.path
+
+    client.post('/control/startingpage_settings/delete_all/')
+    assert not StartingpageFile.objects.exists()
+    assert not os.path.exists(path)
+    assert LogEntry.objects.get(action_type='pretix_landing_pages.startingpagesettings.files_deleted') \
+        .parsed_data['files'] == ['style%d.css' % i for i in range(5)]
+# endregion
+
+
+# region Bundle Upload
+@pytest.mark.django_db
+def test_startingpage_bundle_is_imported(env, client):
+    __login_as_admin(env, client, True)
+    bundle = __get_zip_file('site.zip', {'index.html': b"<html><body>Bundle</body></html>", 'style.css': b"a{}"})
+    client.post('/control/startingpage_settings/', data={'bundle': bundle, 'use_startingpage': 'on',
+                                                         'redirect_link': '', 'apply': 'Apply'})
+    setting = StartingpageSettings.objects.get()
+    assert setting.startingpage_active
+    assert setting.index.read() == b"<html><body>Bundle</body></html>"
+    assert StartingpageFile.objects.get(filename='style.css').file.read() == b"a{}"
+# endregion
+
+
+@pytest.mark.django_db
+def test_invalid_startingpage_is_rejected(env, client):
+    __login_as_admin(env, client, True)
+    r = client.post('/control/startingpage_settings/', data={
+        'file_field': [__get_upload_file('index.html', b"{% block a %}")], 'redirect_link': '', 'apply': 'Apply'
+    })
+    assert 'index.html is no valid template, line 1' in r.content.decode()
+    assert not StartingpageSettings.objects.get_or_create(pk=1)[0].index
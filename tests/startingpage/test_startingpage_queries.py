@@ -0,0 +1,104 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from pretix.base.models import User
+from pretix_landing_pages.models import StartingpageFile, StartingpageSettings
+
+from ..helper_methods import (
+    __count_queries, __get_upload_file, __login_as_admin,
+)
+
+# Upper limits of the queries of the views of the starting page. They must not depend on the number of files,
+# which is checked by comparing few against many of them.
+STARTING_PAGE_INDEX_MAX_QUERIES = 3
+SETTINGS_GET_MAX_QUERIES = 15
+SETTINGS_UPLOAD_MAX_QUERIES = 34
+DELETE_FILE_MAX_QUERIES = 13
+DELETE_ALL_MAX_QUERIES = 13
+
+
+@pytest.fixture
+def env(locmem_cache):
+    admin = User.objects.create_superuser(email="admin@localhost", password="admin")
+    setting = StartingpageSettings.objects.create(startingpage_active=True)
+    return setting, admin
+
+
+def _add_files(start, count):
+    for i in range(start, start + count):
+        StartingpageFile.objects.create(filename='file%d.css' % i, file=__get_upload_file('file%d.css' % i, b"a{}"))
+
+
+def _set_index(setting, load_path_calls):
+    load_paths = ''.join('{%% load_path "file%d.css" %%}' % i for i in range(load_path_calls))
+    setting.index = SimpleUploadedFile('index.html', content=("{% load load_path %}Welcome" + load_paths).encode())
+    setting.template_version += 1
+    setting.save()
+
+
+def _count_page_queries(client):
+    client.get('/')
+    return __count_queries(client.get, '/')
+
+
+@pytest.mark.django_db
+def test_starting_page_index_queries(env, client):
+    _add_files(0, 2)
+    _set_index(env[0], 2)
+    few = _count_page_queries(client)
+
+    _add_files(2, 30)
+    _set_index(env[0], 32)
+    many = _count_page_queries(client)
+    assert many == few
+    assert many <= STARTING_PAGE_INDEX_MAX_QUERIES
+
+
+@pytest.mark.django_db
+def test_settings_page_queries(env, client):
+    __login_as_admin(env, client, True)
+    _add_files(0, 1)
+    # the first request of the session loads data that is cached for the session afterwards
+    client.get('/control/startingpage_settings/')
+    few = __count_queries(client.get, '/control/startingpage_settings/')
+
+    _add_files(1, 50)
+    many = __count_queries(client.get, '/control/startingpage_settings/')
+    assert many == few
+    assert many <= SETTINGS_GET_MAX_QUERIES
+
+
+@pytest.mark.django_db
+def test_upload_queries(env, client):
+    __login_as_admin(env, client, True)
+    client.post('/control/startingpage_settings/', data={'file_field': [__get_upload_file('first.css', b"a{}")],
+                                                         'redirect_link': '', 'apply': 'Apply'})
+    few = __count_queries(client.post, '/control/startingpage_settings/', data={
+        'redirect_link': '', 'apply': 'Apply', 'file_field': [__get_upload_file('a%d.css' % i, b"a{}") for i in range(2)]
+    })
+    many = __count_queries(client.post, '/control/startingpage_settings/', data={
+        'redirect_link': '', 'apply': 'Apply', 'file_field': [__get_upload_file('b%d.css' % i, b"a{}") for i in range(30)]
+    })
+    assert StartingpageFile.objects.count() == 33
+    assert many == few
+    assert many <= SETTINGS_UPLOAD_MAX_QUERIES
+
+
+@pytest.mark.django_db
+def test_delete_queries(env, client):
+    __login_as_admin(env, client, True)
+    _add_files(0, 3)
+    client.post('/control/startingpage_settings/delete_files/file0.css/')
+    few = __count_queries(client.post, '/control/startingpage_settings/delete_files/file1.css/')
+
+    _add_files(3, 30)
+    many = __count_queries(client.post, '/control/startingpage_settings/delete_files/file2.css/')
+    assert many == few
+    assert many <= DELETE_FILE_MAX_QUERIES
+
+    assert StartingpageFile.objects.count() == 30
+    many = __count_queries(client.post, '/control/startingpage_settings/delete_all/')
+    _add_files(0, 2)
+    few = __count_queries(client.post, '/control/startingpage_settings/delete_all/')
+    assert not StartingpageFile.objects.exists()
+    assert many == few
+    assert many <= DELETE_ALL_MAX_QUERIES
@@ -1,8 +1,12 @@
+import os
+import pathlib
+
 import pytest
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils.timezone import now
 from pretix.base.models import LogEntry, User
 from pretix_landing_pages.models import StartingpageSettings
+from pretix_landing_pages.views import starting_page_base_dir
 
 from ..helper_methods import __login_as_admin
 
@@ -134,6 +138,47 @@ def test_invalid_input_configuration(env, client):
 # endregion
 
 
+# region Template Version
+@pytest.mark.django_db
+def test_outdated_startingpage_is_reloaded(env, client):
+    setting, _ = StartingpageSettings.objects.get_or_create(pk=1)
+    setting.index = SimpleUploadedFile('index.html', content=b"<html><body>First version</body></html>")
+    setting.startingpage_active = True
+    setting.save()
+    r = client.get("/")
+    assert b"First version" in r.content
+
+    # another worker replaces the file without touching the template cache of this worker
+    pathlib.PosixPath(os.path.join(starting_page_base_dir, 'index.html')) \
+        .write_bytes(b"<html><body>Second version</body></html>")
+    r = client.get("/")
+    assert b"First version" in r.content
+
+    StartingpageSettings.objects.filter(pk=1).update(template_version=setting.template_version + 1)
+    r = client.get("/")
+    assert b"Second version" in r.content
+# endregion
+
+
+# region Conditional Requests
+@pytest.mark.django_db
+def test_unchanged_startingpage_is_not_modified(env, client):
+    setting, _ = StartingpageSettings.objects.get_or_create(pk=1)
+    setting.index = SimpleUploadedFile('index.html', content=b"<html><body>First version</body></html>")
+    setting.startingpage_active = True
+    setting.save()
+    etag = client.get("/")['ETag']
+    r = client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 304
+    assert not r.templates
+
+    StartingpageSettings.objects.filter(pk=1).update(template_version=setting.template_version + 1)
+    r = client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 200
+    assert r['ETag'] != etag
+# endregion
+
+
 # region Helper
 def __log_entry_redirect_activation_count(new_status):
     return LogEntry.objects \
@@ -4,6 +4,11 @@ import pytest
 from django.utils.timezone import now
 from django_scopes import scope
 from pretix.base.models import Event, Organizer, SubEvent
+from pretix.multidomain.models import KnownDomain
+from pretix_landing_pages.calendar_data import (
+    build_calendar_month, get_next_date,
+)
+from pretix_landing_pages.models import LandingpageSettings
 from pretix_landing_pages.templatetags.load_calendar_data import (
     load_calendar_data,
 )
@@ -99,6 +104,84 @@ def test_month_year_in_request(env):
     _load_data_and_assert_month_year(env[0], now().month, now().year, request)
 
 
+@pytest.mark.django_db
+def test_calendar_month_is_cached(env, locmem_cache, django_assert_num_queries):
+    date_from = env[3].date_from
+    request = RequestMock(env[0], year=date_from.year, month=date_from.month)
+    with scope(organizer=env[0]):
+        calendar_data = load_calendar_data(ContextMock(request), request)
+        assert _event_names(calendar_data) == ['event_post_1']
+
+        with django_assert_num_queries(0):
+            assert load_calendar_data(ContextMock(request), request)['weeks'] == calendar_data['weeks']
+
+
+@pytest.mark.django_db
+def test_calendar_month_invalidated_on_event_change(env, locmem_cache):
+    date_from = env[3].date_from
+    request = RequestMock(env[0], year=date_from.year, month=date_from.month)
+    with scope(organizer=env[0]):
+        load_calendar_data(ContextMock(request), request)
+        Event.objects.create(organizer=env[0], name="event_post_2", slug="post2", live=1, date_from=date_from)
+        assert _event_names(load_calendar_data(ContextMock(request), request)) == ['event_post_1', 'event_post_2']
+
+        moved = Event.objects.get(slug="post2")
+        moved.date_from = date_from + timedelta(days=62)
+        moved.save()
+        assert _event_names(load_calendar_data(ContextMock(request), request)) == ['event_post_1']
+
+
+@pytest.mark.django_db
+def test_next_date_is_stored(env, locmem_cache, django_assert_num_queries):
+    LandingpageSettings.objects.create(organizer=env[0], active=True)
+    with scope(organizer=env[0]):
+        assert get_next_date(env[0]) == (env[3].date_from, 'UTC')
+        assert LandingpageSettings.objects.get(organizer=env[0]).next_date_from == env[3].date_from
+
+        get_next_date(env[0])
+        with django_assert_num_queries(0):
+            assert get_next_date(env[0]) == (env[3].date_from, 'UTC')
+
+        event_soon = Event.objects.create(organizer=env[0], name="event_soon", slug="soon", live=1,
+                                          date_from=now() + timedelta(days=1))
+        event_soon.settings.timezone = 'Europe/Berlin'
+        assert get_next_date(env[0]) == (event_soon.date_from, 'Europe/Berlin')
+
+        event_soon.delete()
+        assert get_next_date(env[0]) == (env[3].date_from, 'UTC')
+
+
+@pytest.mark.django_db
+def test_passed_next_date_is_replaced(env, locmem_cache):
+    LandingpageSettings.objects.create(organizer=env[0], active=True)
+    LandingpageSettings.objects.filter(organizer=env[0]).update(
+        next_date_from=now() - timedelta(minutes=1), next_date_timezone='UTC', next_date_version=0
+    )
+    with scope(organizer=env[0]):
+        assert get_next_date(env[0]) == (env[3].date_from, 'UTC')
+
+
+@pytest.mark.django_db
+def test_event_urls_respect_custom_domains(env):
+    request = RequestMock(env[0], env[3].date_from.year, env[3].date_from.month)
+    with scope(organizer=env[0]):
+        assert _event_urls(load_calendar_data(ContextMock(request), request)) == ['/dummy/post1/']
+
+        KnownDomain.objects.create(domainname='tickets.example.org', organizer=env[0])
+        calendar_data = build_calendar_month(env[0], env[3].date_from.year, env[3].date_from.month, False)
+        assert _event_urls(calendar_data) == ['http://tickets.example.org/post1/']
+
+
+def _event_urls(calendar_data):
+    return [entry['url'] for week in calendar_data['weeks'] for day in week if day and day['events']
+            for entry in day['events']]
+
+
+def _event_names(calendar_data):
+    return sorted(entry['event']['name'] for week in calendar_data['weeks'] for day in week if day and day['events']
+                  for entry in day['events'])
+
+
 def _load_data_and_assert_month_year(organizer, expected_month, expected_year, request=None):
     request = request if request else RequestMock(organizer)
     context = ContextMock(request)
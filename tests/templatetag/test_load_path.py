@@ -1,10 +1,14 @@
+import os
 import re
 
 import pytest
 from django.core.files.uploadedfile import SimpleUploadedFile
 from pretix.base.models import Organizer
+from pretix.settings import MEDIA_ROOT, MEDIA_URL
 from pretix_landing_pages.models import LandingpageFile, StartingpageFile
-from pretix_landing_pages.templatetags.load_path import load_path
+from pretix_landing_pages.templatetags.load_path import (
+    load_bundle, load_path, load_srcset,
+)
 
 
 class ContextMock(object):
@@ -50,3 +54,55 @@ def test_path_to_startingpage_correct(env):
 
     path = load_path(context, "kein.css")
     assert path == ''
+
+
+@pytest.mark.django_db
+def test_manifest_is_loaded_once_per_request(env, django_assert_num_queries):
+    context = ContextMock(RequestMock(env))
+    with django_assert_num_queries(1):
+        for i in range(10):
+            assert load_path(context, "test.css")
+        assert load_path(context, "kein.css") == ''
+
+
+@pytest.mark.django_db
+def test_manifest_is_cached_and_invalidated(env, locmem_cache, django_assert_num_queries):
+    load_path(ContextMock(RequestMock(env)), "test.css")
+    with django_assert_num_queries(0):
+        assert load_path(ContextMock(RequestMock(env)), "test.css")
+
+    new_file = SimpleUploadedFile(name="new.css", content=b".h2{color:red}", content_type="text/plain")
+    LandingpageFile.objects.create(organizer=env, filename="new.css", file=new_file)
+    path = load_path(ContextMock(RequestMock(env)), "new.css")
+    assert re.match(r'^.*templates/landing_pages/1/new.css', path)
+
+
+@pytest.mark.django_db
+def test_srcset_of_image_variants(env, django_assert_num_queries):
+    image = SimpleUploadedFile(name="hero.png", content=b"PNG", content_type="image/png")
+    LandingpageFile.objects.create(organizer=env, filename="hero.png", file=image, content_hash='0123456789abcdef',
+                                   variant_widths='480,960')
+    context = ContextMock(RequestMock(env))
+    with django_assert_num_queries(1):
+        srcset = load_srcset(context, "hero.png")
+        assert load_srcset(context, "test.css") == ''
+    assert re.match(r'^.*/landing_pages/1/hero-480w\.0123456789ab\.webp 480w, .*/hero-960w\.0123456789ab\.webp 960w$', srcset)
+    assert load_srcset(context, "hero.png", "jpeg").endswith('/hero-960w.0123456789ab.jpg 960w')
+
+
+@pytest.mark.django_db
+def test_bundle_concatenates_files(env, locmem_cache, django_assert_num_queries):
+    second_file = SimpleUploadedFile(name="second.css", content=b".h2{color:red}", content_type="text/plain")
+    LandingpageFile.objects.create(organizer=env, filename="second.css", file=second_file)
+
+    url = load_bundle(ContextMock(RequestMock(env)), "second.css", "test.css", "kein.css")
+    assert re.match(r'^.*templates/landing_pages/1/bundle\.[0-9a-f]{12}\.css$', url)
+    path = os.path.join(MEDIA_ROOT, url[len(MEDIA_URL):])
+    with open(path, 'rb') as f:
+        assert f.read() == b".h2{color:red}\n.h1{color:green}"
+    assert os.path.isfile(path + '.gz')
+
+    with django_assert_num_queries(0):
+        assert load_bundle(ContextMock(RequestMock(env)), "second.css", "test.css", "kein.css") == url
+    assert load_bundle(ContextMock(RequestMock(env)), "test.css", "second.css") != url
+    assert load_bundle(ContextMock(RequestMock(env)), "kein.css") == ''
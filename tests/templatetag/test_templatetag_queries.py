@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils.timezone import now
+from django_scopes import scope
+from pretix.base.models import Event, Organizer
+from pretix_landing_pages.cache import invalidate_calendar_months
+from pretix_landing_pages.models import LandingpageFile
+from pretix_landing_pages.templatetags.load_calendar_data import (
+    load_calendar_data,
+)
+from pretix_landing_pages.templatetags.load_path import (
+    load_bundle, load_path, load_srcset,
+)
+
+from ..helper_methods import __count_queries, __get_upload_file
+
+# Upper limits of the queries of the template tags. They must not depend on the number of events, files or calls,
+# which is checked by comparing few against many of them.
+LOAD_PATH_MAX_QUERIES = 1
+LOAD_SRCSET_MAX_QUERIES = 1
+LOAD_BUNDLE_MAX_QUERIES = 2
+LOAD_CALENDAR_DATA_MAX_QUERIES = 9
+
+
+class ContextMock(dict):
+    def __init__(self, request):
+        super().__init__()
+        self.request = request
+
+
+class RequestMock(object):
+    def __init__(self, organizer):
+        super().__init__()
+        self.organizer = organizer
+        self.session = {}
+        self.GET = {}
+
+
+@pytest.fixture
+def env(locmem_cache):
+    return Organizer.objects.create(slug="counted", name="Counted")
+
+
+def _add_files(organizer, start, count):
+    for i in range(start, start + count):
+        LandingpageFile.objects.create(organizer=organizer, filename='file%d.png' % i, variant_widths='480,960',
+                                       content_hash='%016d' % i, file=__get_upload_file('file%d.png' % i, b"PNG"))
+        LandingpageFile.objects.create(organizer=organizer, filename='file%d.css' % i,
+                                       file=__get_upload_file('file%d.css' % i, b"a{}"))
+
+
+def _call_tag(tag, organizer, calls):
+    context = ContextMock(RequestMock(organizer))
+    for i in range(calls):
+        tag(context, 'file%d.png' % i)
+
+
+def _count_tag_queries(tag, organizer, calls):
+    # the manifests are cached across requests, so they are dropped to count the queries of a cold cache
+    cache.clear()
+    return __count_queries(_call_tag, tag, organizer, calls)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('tag, max_queries', [
+    (load_path, LOAD_PATH_MAX_QUERIES),
+    (load_srcset, LOAD_SRCSET_MAX_QUERIES),
+])
+def test_asset_tag_queries(env, tag, max_queries):
+    _add_files(env, 0, 2)
+    few = _count_tag_queries(tag, env, 2)
+
+    _add_files(env, 2, 50)
+    many = _count_tag_queries(tag, env, 52)
+    assert many == few
+    assert many <= max_queries
+
+
+@pytest.mark.django_db
+def test_bundle_tag_queries(env):
+    _add_files(env, 0, 2)
+    cache.clear()
+    few = __count_queries(load_bundle, ContextMock(RequestMock(env)), *['file%d.css' % i for i in range(2)])
+
+    _add_files(env, 2, 50)
+    cache.clear()
+    many = __count_queries(load_bundle, ContextMock(RequestMock(env)), *['file%d.css' % i for i in range(52)])
+    assert many == few
+    assert many <= LOAD_BUNDLE_MAX_QUERIES
+
+
+def _add_events(organizer, start, count):
+    for i in range(start, start + count):
+        Event.objects.create(organizer=organizer, name="Event %d" % i, slug="event%d" % i, live=True,
+                             date_from=now() + timedelta(minutes=i + 1))
+
+
+def _count_calendar_queries(organizer):
+    # the first call fills the caches pretix keeps for every event, e.g. of its domain,
+    # the calendar of the shown month is dropped afterwards, so it is computed by the measured call again
+    load_calendar_data(ContextMock(RequestMock(organizer)), RequestMock(organizer))
+    next_date = now() + timedelta(minutes=1)
+    invalidate_calendar_months(organizer.id, [(next_date.year, next_date.month)])
+    return __count_queries(load_calendar_data, ContextMock(RequestMock(organizer)), RequestMock(organizer))
+
+
+@pytest.mark.django_db
+def test_calendar_tag_queries(env):
+    with scope(organizer=env):
+        _add_events(env, 0, 2)
+        few = _count_calendar_queries(env)
+
+        _add_events(env, 2, 50)
+        many = _count_calendar_queries(env)
+    assert many == few
+    assert many <= LOAD_CALENDAR_DATA_MAX_QUERIES